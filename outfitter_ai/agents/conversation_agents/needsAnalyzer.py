@@ -10,6 +10,12 @@ from langchain_openai import ChatOpenAI
 from agents.state import OutfitterState
 import json
 
+
+def _clean_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip string values once here so downstream query builders can use them as-is"""
+    return {key: value.strip() if isinstance(value, str) else value for key, value in criteria.items()}
+
+
 class NeedsAnalyzer:
     """
     AI-powered needs analyzer that extracts shopping criteria from conversation
@@ -241,6 +247,7 @@ Can we search effectively with this information? Return JSON assessment:"""
     
     def _build_state_update(self, criteria: Dict[str, Any], sufficiency_result: Dict[str, Any], next_step: str) -> Dict[str, Any]:
         """Build the state update for LangGraph"""
+        criteria = _clean_criteria(criteria)
         
         if next_step == "parallel_searcher":
             # Ready to search
@@ -274,7 +281,7 @@ Can we search effectively with this information? Return JSON assessment:"""
         """Emergency fallback when AI analysis fails completely"""
         print("🚨 Using fallback needs analysis")
         
-        current_criteria = state.get("search_criteria", {})
+        current_criteria = _clean_criteria(state.get("search_criteria", {}))
         
         # Simple rule-based fallback
         if current_criteria.get("category"):
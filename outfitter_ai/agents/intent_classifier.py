@@ -49,6 +49,14 @@ import json
 import re
 from datetime import datetime
 
+# Messages unambiguous enough to classify without an LLM round-trip.
+# Matched against the normalized (lowercased, stripped) message.
+_FAST_SELECTION_RE = re.compile(r"^(?:#|no\.?|number|option|item)?\s*#?\d{1,2}[.!]*$")
+_FAST_CART_VIEW_RE = re.compile(
+    r"^(?:(?:view|show|see|open)(?: me)?(?: my)? cart|what'?s in my cart|my cart|cart)[.!?]*$"
+)
+_FAST_CHECKOUT_RE = re.compile(r"^(?:check ?out|proceed to checkout|checkout now)[.!]*$")
+
 class IntentAnalysis(BaseModel):
     """Structured output for intent classification"""
     primary_intent: str = Field(description="Main intent: greeting, search, selection, checkout, general, clarification, complaint")
@@ -109,8 +117,11 @@ class RobustIntentClassifier:
             if self._is_urgent_message(user_message):
                 return self._handle_urgent_message(user_message, context)
             
-            # Main AI-powered classification
-            intent_analysis = self._ai_classify_with_context(user_message, context)
+            # Main AI-powered classification (skipped for unambiguous short commands)
+            intent_analysis = (
+                self._fast_classify(user_message, context)
+                or self._ai_classify_with_context(user_message, context)
+            )
             
             # Validate and enhance the classification
             validated_result = self._validate_and_enhance_classification(intent_analysis, context)
@@ -196,6 +207,26 @@ class RobustIntentClassifier:
             "reasoning": "Urgent keywords detected - prioritizing customer support"
         }
     
+    def _fast_classify(self, message: str, context: ConversationContext) -> Optional[IntentAnalysis]:
+        """Rule-based classification for commands that need no LLM; None if ambiguous"""
+        if context.products_shown > 0 and _FAST_SELECTION_RE.match(message):
+            intent, reasoning = "selection", "Rule-based fast path: bare item number while products are shown"
+        elif _FAST_CART_VIEW_RE.match(message):
+            intent, reasoning = "cart", "Rule-based fast path: view cart request"
+        elif context.cart_items > 0 and _FAST_CHECKOUT_RE.match(message):
+            intent, reasoning = "checkout", "Rule-based fast path: checkout request with items in cart"
+        else:
+            return None
+        
+        return IntentAnalysis(
+            primary_intent=intent,
+            confidence=0.95,
+            reasoning=reasoning,
+            sentiment="neutral",
+            urgency="low",
+            next_recommended_action=self._map_intent_to_action(intent)
+        )
+    
     def _ai_classify_with_context(self, message: str, context: ConversationContext) -> IntentAnalysis:
         """Use AI to classify with full context understanding"""
         
@@ -25,11 +25,14 @@ class OutfitterState(TypedDict):
     
     # Shopping criteria extracted from user
     search_criteria: Dict[str, Any]
+    search_query: Optional[str]  # query string built from search_criteria by the searcher
+    user_request: Optional[str]  # request string the searcher verified results against
     
     # Products and selections
     search_results: List[Dict[str, Any]]
     selected_products: List[Dict[str, Any]]  # MAIN CART - persists across turns
     products_shown: List[Dict[str, Any]]
+    verification_completed: Optional[bool]  # search_results already passed the verifier
     
     # Cart-specific fields (ADD THESE)
     pending_cart_additions: Optional[List[Dict[str, Any]]]  # Items waiting to be added
@@ -5,301 +5,341 @@ Production-grade interface with stunning gradients, animations, and modern desig
 
 import gradio as gr
 import asyncio
-from typing import List, Dict, Any, Tuple, Optional
-from main import OutfitterAssistant
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator, TYPE_CHECKING
 import html
 import json
 import re
+import time
+import os
+import base64
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from functools import lru_cache
 
-class AssistifyUI:
-    def __init__(self):
-        self.assistant = OutfitterAssistant()
-        self.assistant.setup_graph()
-        self.conversation_history = []
-        self.current_products = []
-        self.current_cart = []
-        self.current_user_photo = None
-        self.pending_cart_removal = None  # Track pending cart removal
-    
-    def _safe_price_calculation(self, item: Dict[str, Any]) -> float:
-        """Safely calculate price * quantity, handling string prices"""
-        try:
-            price = item.get('price', 0)
-            quantity = item.get('quantity', 1)
-            
-            # Convert price to float if it's a string
-            if isinstance(price, str):
-                # Remove currency symbols and convert to float
-                price_str = price.replace('$', '').replace(',', '').strip()
-                price = float(price_str)
-            elif not isinstance(price, (int, float)):
-                price = 0.0
-            
-            # Ensure quantity is numeric
-            if not isinstance(quantity, (int, float)):
-                quantity = 1
-            
-            return price * quantity
-        except (ValueError, TypeError):
-            return 0.0
-        
-    def extract_products_from_state(self, conversation_result: List[Dict]) -> List[Dict[str, Any]]:
-        """Extract products from conversation state"""
-        try:
-            if hasattr(self.assistant, 'last_products') and self.assistant.last_products:
-                print(f"🔍 Found {len(self.assistant.last_products)} products")
-                return self.assistant.last_products
-            
-            if hasattr(self.assistant, '_last_state'):
-                products = self.assistant._last_state.get('products_shown', [])
-                if not products:
-                    products = self.assistant._last_state.get('search_results', [])
+if TYPE_CHECKING:
+    from main import OutfitterAssistant
+
+logger = logging.getLogger(__name__)
+
+# Generated try-on images are written here and served by Gradio as static files,
+# so the results HTML carries a short URL instead of an inline base64 image
+TRYON_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tryon_outputs")
+os.makedirs(TRYON_OUTPUT_DIR, exist_ok=True)
+gr.set_static_paths(paths=[TRYON_OUTPUT_DIR])
+
+# Most recently used try-on images kept in TRYON_OUTPUT_DIR (older files are deleted)
+TRYON_OUTPUT_MAX_FILES = 200
+
+# File extension per image MIME type / leading magic bytes; unrecognized data is
+# saved as JPEG, the format the try-on agent returns
+_IMAGE_MIME_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/gif": ".gif", "image/webp": ".webp"}
+_IMAGE_MAGIC_EXTENSIONS = ((b"\x89PNG\r\n\x1a\n", ".png"), (b"\xff\xd8\xff", ".jpg"), (b"GIF8", ".gif"))
+
+# Number of completed conversation turns memoized by AssistifyUI (LRU eviction)
+CONVERSATION_CACHE_SIZE = 256
+
+# Seconds a memoized turn stays valid, so replayed search results and prices go
+# stale no later than the backend's own search cache (SEARCH_CACHE_TTL in main)
+CONVERSATION_CACHE_TTL = 300
+
+# Rendered products grids kept by AssistifyUI, keyed by the product fields shown (LRU eviction)
+PRODUCTS_HTML_CACHE_SIZE = 16
+
+# Product fields a card renders; a change in any of them means the grid must be re-rendered
+_PRODUCT_RENDER_FIELDS = ("url", "name", "price", "image_url", "store_name", "is_on_sale")
+
+# Most recent chat messages passed to the backend per turn (older ones are only displayed)
+BACKEND_HISTORY_MESSAGES = 20
+
+# Maximum number of backend (LLM graph) runs in flight at once. Every turn goes
+# through the one shared OutfitterAssistant (same thread_id, _last_state and
+# last_products), so turns must not interleave until that state is per session
+LLM_CONCURRENCY = 1
+_LLM_SEM = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Minimum gap between streamed UI updates (at most 8 per second)
+STREAM_MIN_INTERVAL = 0.125
+
+# Static placeholders - built once at import and reused for every render/clear
+_EMPTY_PRODUCTS_HTML = """
+        <div class="products-section">
+            <div class="empty-state">
+                <div class="empty-state-icon">👕</div>
+                <h3 class="empty-state-title">Products will appear here</h3>
+                <p class="empty-state-text">Start by telling me what you're looking for...</p>
+            </div>
+        </div>
+        """
+
+_EMPTY_CART_HTML = """
+            <div class="cart-section">
+                <div class="empty-state">
+                    <div class="empty-state-icon">🛒</div>
+                    <h3 class="empty-state-title">Your cart is empty</h3>
+                    <p class="empty-state-text">Add some items to get started!</p>
+                </div>
+            </div>
+            """
+
+_ERROR_HTML = """
+        <div class="products-section">
+            <div class="empty-state">
+                <div class="empty-state-icon">⚠️</div>
+                <h3 class="empty-state-title">Something went wrong</h3>
+                <p class="empty-state-text">Please try your search again</p>
+            </div>
+        </div>
+        """
+
+# One cart row of the direct cart display (%-formatted with a dict of fields)
+_CART_ITEM_TEMPLATE = """
+            <div class="cart-item-card" data-index="%(index)d">
+                <div class="cart-item-image">
+                    %(image_html)s
+                </div>
                 
-                if products:
-                    print(f"🔍 Found {len(products)} products from state")
-                    return products
-            
-            return []
-            
-        except Exception as e:
-            print(f"❌ Error extracting products: {e}")
-            return []
+                <div class="cart-item-content">
+                    <div class="cart-item-header">
+                        <h4 class="cart-item-name">%(name)s</h4>
+                        <div class="cart-item-actions">
+                            <div class="cart-item-number">#%(number)d</div>
+                            <button class="cart-item-remove-btn" onclick="removeCartItem(%(index)d)" title="Remove item #%(number)d" data-item-index="%(index)d">×</button>
+                        </div>
+                    </div>
+                    
+                    <div class="cart-item-details">
+                        <div class="cart-item-store">
+                            <span class="store-icon">🏪</span>
+                            <span class="store-name">%(store)s</span>
+                        </div>
+                        
+                        <div class="cart-item-specs">
+                            <span class="spec-item">
+                                <span class="spec-label">Size:</span>
+                                <span class="spec-value">%(size)s</span>
+                            </span>
+                            <span class="spec-item">
+                                <span class="spec-label">Qty:</span>
+                                <span class="spec-value">%(quantity)s</span>
+                            </span>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="cart-item-pricing">
+                    <div class="cart-item-price">%(price_str)s</div>
+                    <div class="cart-item-total">$%(item_total).2f</div>
+                </div>
+            </div>
+"""
 
-    def extract_cart_from_state(self, conversation_result: List[Dict]) -> List[Dict[str, Any]]:
-        """Extract cart items from conversation state"""
-        try:
-            print(f"🔍 DEBUG: Extracting cart from state...")
-            print(f"🔍 DEBUG: assistant._last_state exists: {hasattr(self.assistant, '_last_state')}")
-            
-            if hasattr(self.assistant, '_last_state') and self.assistant._last_state:
-                print(f"🔍 DEBUG: _last_state keys: {list(self.assistant._last_state.keys())}")
-                cart_items = self.assistant._last_state.get('selected_products', [])
-                print(f"🔍 DEBUG: selected_products from state: {len(cart_items)} items")
-                if cart_items:
-                    print(f"🛒 Found {len(cart_items)} cart items")
-                    for i, item in enumerate(cart_items):
-                        print(f"   {i+1}. {item.get('name', 'Unknown')} - {item.get('price', 'N/A')}")
-                    return cart_items
-                else:
-                    print("🛒 No cart items in selected_products")
-            else:
-                print("🛒 No _last_state available")
-            
-            print("🛒 Returning empty cart")
-            return []
-            
-        except Exception as e:
-            print(f"❌ Error extracting cart: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+_PLACEHOLDER_IMAGE_URL = "https://via.placeholder.com/400x400/1a1a2e/667eea?text=No+Image"
+_SALE_BADGE_HTML = '<div class="product-badge">🔥 SALE</div>'
+
+
+# Page-level script for the cart and product panels, loaded once through gr.Blocks(head=...).
+# Scripts inside gr.HTML values are not executed, and re-sending them on every render is wasted work.
+_PAGE_SCRIPT_HTML = """
+    <script>
+    const PLACEHOLDER_IMAGE_URL = "%s";
     
-    async def handle_cart_removal(self, index: int) -> Tuple[List, str, str, gr.Column]:
-        """Handle cart item removal by index"""
-        print(f"🗑️ Handling cart removal for index: {index}")
-        
-        # Get current cart from state
-        cart_items = self.extract_cart_from_state([])
-        
-        if 0 <= index < len(cart_items):
-            # Remove the item
-            removed_item = cart_items.pop(index)
-            print(f"   ✅ Removed item: {removed_item.get('name', 'Unknown')}")
+    // Enhanced removeCartItem function for X buttons
+    window.removeCartItem = function(index) {
+        console.log('X button clicked - removing item at index:', index);
+        
+        // Try multiple ways to find the message input
+        let messageInput = null;
+        const selectors = [
+            'textarea[placeholder*="Tell me what"]',
+            'textarea[placeholder*="Tell me"]',
+            'textarea[data-testid*="textbox"]',
+            'textarea',
+            'input[type="text"]'
+        ];
+        
+        for (const selector of selectors) {
+            messageInput = document.querySelector(selector);
+            if (messageInput) break;
+        }
+        
+        if (messageInput) {
+            console.log('Found message input:', messageInput);
+            
+            // Set the message
+            const message = `remove item #${index + 1} from cart`;
+            messageInput.value = message;
+            messageInput.focus();
+            
+            // Trigger multiple events to ensure Gradio picks up the change
+            const events = ['input', 'change', 'keyup', 'keydown', 'blur'];
+            events.forEach(eventType => {
+                messageInput.dispatchEvent(new Event(eventType, { bubbles: true, cancelable: true }));
+            });
+            
+            // Try multiple ways to find the send button
+            let sendButton = null;
+            const buttonSelectors = [
+                'button:has-text("Send")',
+                'button[class*="neon-button"]',
+                'button[type="submit"]',
+                'button[data-testid*="send"]',
+                'button:contains("Send")',
+                'button'
+            ];
             
-            # Update the assistant's state
-            if hasattr(self.assistant, '_last_state'):
-                self.assistant._last_state['selected_products'] = cart_items
+            for (const selector of buttonSelectors) {
+                const buttons = document.querySelectorAll(selector);
+                for (const btn of buttons) {
+                    if (btn.textContent.includes('Send') || btn.textContent.includes('send')) {
+                        sendButton = btn;
+                        break;
+                    }
+                }
+                if (sendButton) break;
+            }
             
-            # Create removal message
-            message = f"remove item #{index + 1} from cart"
+            if (sendButton) {
+                console.log('Found send button:', sendButton);
+                // Click the send button with a delay
+                setTimeout(() => {
+                    sendButton.click();
+                    console.log('Send button clicked for X button removal');
+                }, 300);
+            } else {
+                console.error('Could not find send button');
+                // Try to trigger form submission
+                const form = messageInput.closest('form');
+                if (form) {
+                    form.submit();
+                }
+            }
+        } else {
+            console.error('Could not find message input');
+            alert(`Remove item #${index + 1} from cart - Please type this in the chat`);
+        }
+    };
+    
+    // Ensure the function is available globally
+    if (typeof window !== 'undefined') {
+        window.removeCartItem = window.removeCartItem || function(index) {
+            console.log('Fallback removeCartItem called with index:', index);
+            alert(`Remove item #${index + 1} from cart - Please type this in the chat`);
+        };
+    }
+    
+    // Swap broken product images for the placeholder; error events don't bubble,
+    // so one capture-phase listener covers every card the grid renders
+    document.addEventListener('error', function(event) {
+        const img = event.target;
+        if (img.classList && img.classList.contains('product-image') && img.src !== PLACEHOLDER_IMAGE_URL) {
+            img.src = PLACEHOLDER_IMAGE_URL;
+        }
+    }, true);
+    </script>
+""" % _PLACEHOLDER_IMAGE_URL
+
+# One product card of the products grid (%-formatted with a dict of fields)
+_PRODUCT_CARD_TEMPLATE = """
+        <div class="product-card" data-index="%(index)d">
+            <div class="product-image-container">
+                <img 
+                    src="%(image_url)s" 
+                    alt="%(name)s"
+                    class="product-image"
+                />
+                %(sale_badge)s
+                <div class="store-badge">%(store)s</div>
+            </div>
             
-            # Process with backend to get proper response
-            try:
-                result = await self.assistant.run_conversation(message, self.conversation_history)
-                self.conversation_history = result.get("messages", [])
-                
-                # Extract updated cart
-                updated_cart = result.get("selected_products", cart_items)
+            <div class="product-content">
+                <h3 class="product-title">%(name)s</h3>
+                <div class="product-price">%(price)s</div>
                 
-                return (
-                    self.conversation_history,
-                    self.create_empty_products_html(),
-                    self.format_cart_page_html_simple(updated_cart),
-                    gr.update(visible=False)
-                )
-            except Exception as e:
-                print(f"❌ Error processing cart removal: {e}")
-                return (
-                    self.conversation_history,
-                    self.create_empty_products_html(),
-                    self.format_cart_page_html_simple(cart_items),
-                    gr.update(visible=False)
-                )
-        else:
-            print(f"❌ Invalid index for removal: {index}")
-            return (
-                self.conversation_history,
-                self.create_empty_products_html(),
-                self.format_cart_page_html_simple(cart_items),
-                gr.update(visible=False)
-            )
+                <div class="product-actions">
+                    <a href="%(url)s" target="_blank" class="view-btn">
+                        <span>View Product</span>
+                        <span>→</span>
+                    </a>
+                </div>
+            </div>
+        </div>
+        """
 
-    def handle_direct_removal(self, item_index: int, history: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], str, str, gr.update, gr.update, gr.update, *List[gr.update]]:
-        """Handle direct removal of cart item by index"""
-        try:
-            # Get current cart items
-            cart_items = self.extract_cart_from_state([])
+
+# Component configuration shared by every interface build
+_CHATBOT_KWARGS = dict(
+    label="",
+    height=700,
+    show_label=False,
+    bubble_full_width=False,
+    type="messages",
+    elem_classes=["chat-section"],
+)
+
+_MESSAGE_BOX_KWARGS = dict(
+    label="",
+    placeholder="Tell me what you're looking for...",
+    lines=3,
+    show_label=False,
+    scale=1,
+    elem_classes=["large-text-input"],
+)
+
+# Virtual try-on sidebar copy, pre-rendered to HTML so it isn't re-parsed as markdown
+_TRYON_UPLOAD_HEADER_HTML = "<h3>📸 Upload Your Photo</h3>"
+
+_TRYON_INSTRUCTIONS_HTML = """
+<div style="color: white;">
+    <p><strong>How it works:</strong></p>
+    <ol>
+        <li>Upload a clear photo of yourself</li>
+        <li>Click "Try On Items" to see how your cart items look on you</li>
+        <li>The AI will overlay the clothing onto your photo realistically</li>
+    </ol>
+</div>
+"""
+
+
+# Page stylesheet and hero header (static, passed once to gr.Blocks / gr.HTML)
+_ASSISTIFY_CSS = """
+        /* 🎨 ASSISTIFY COLOR SYSTEM */
+        :root {
+            /* Primary Gradient (Pink to Orange like Assistify) */
+            --gradient-primary: linear-gradient(135deg, #FF6B9D 0%, #FFA06B 50%, #FFD06B 100%);
+            --gradient-secondary: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            --gradient-accent: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
             
-            if not cart_items or item_index >= len(cart_items):
-                error_msg = "Item not found in cart."
-                error_history = history + [
-                    {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
-                    {"role": "assistant", "content": error_msg}
-                ]
-                # Get empty remove button updates
-                row_updates, button_updates = self.get_remove_button_updates([])
-                return error_history, self.create_error_html(error_msg), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
+            /* Dark Theme (Navy/Purple like Assistify) */
+            --bg-primary: #0F0F23;
+            --bg-secondary: #1A1A2E;
+            --bg-tertiary: #16213E;
+            --bg-card: rgba(26, 26, 46, 0.8);
             
-            # Remove the item
-            removed_item = cart_items.pop(item_index)
-            removed_item_name = removed_item.get('name', 'Unknown Product')
+            /* Glassmorphism */
+            --glass-bg: rgba(255, 255, 255, 0.05);
+            --glass-border: rgba(255, 255, 255, 0.1);
+            --glass-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
             
-            # Update the assistant's state
-            if hasattr(self, 'assistant') and hasattr(self.assistant, 'state'):
-                self.assistant.state['cart'] = cart_items
+            /* Text */
+            --text-primary: #FFFFFF;
+            --text-secondary: #B8B8D1;
+            --text-muted: #8B8BA7;
             
-            # Update current cart
-            self.current_cart = cart_items
+            /* Accents */
+            --accent-cyan: #4ECDC4;
+            --accent-pink: #FF6B9D;
+            --accent-purple: #667eea;
             
-            # Create success message
-            success_msg = f"✅ Removed '{removed_item_name}' from your cart."
-            updated_history = history + [
-                {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
-                {"role": "assistant", "content": success_msg}
-            ]
-            
-            # Create updated displays
-            products_html = self.create_products_grid_html(self.current_products) if self.current_products else self.create_empty_products_html()
-            cart_html = self.create_direct_cart_display(cart_items)
-            
-            # Show virtual try-on sidebar if cart has items
-            sidebar_visible = len(cart_items) > 0
-            remove_controls_visible = len(cart_items) > 0
-            
-            # Get remove button updates
-            row_updates, button_updates = self.get_remove_button_updates(cart_items)
-            
-            return updated_history, products_html, cart_html, gr.update(visible=sidebar_visible), gr.update(visible=remove_controls_visible), gr.update(visible=remove_controls_visible), *row_updates, *button_updates
-            
-        except Exception as e:
-            print(f"❌ Error in direct removal: {e}")
-            import traceback
-            traceback.print_exc()
-            error_msg = "I encountered an error removing the item. Please try again."
-            error_history = history + [
-                {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
-                {"role": "assistant", "content": error_msg}
-            ]
-            # Get empty remove button updates
-            row_updates, button_updates = self.get_remove_button_updates([])
-            return error_history, self.create_error_html(str(e)), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
-
-    async def handle_conversation(self, message: str, history: List) -> Tuple[List, str, str, gr.Column]:
-        """Handle conversation with product and cart extraction"""
-        
-        if not message.strip():
-            return history, self.create_empty_products_html(), self.format_cart_page_html_simple([]), gr.update(visible=False)
-        
-        try:
-            # Convert message format
-            history_dicts = []
-            for msg in history:
-                if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                    history_dicts.append(msg)
-                elif isinstance(msg, list) and len(msg) == 2:
-                    user_msg, assistant_msg = msg
-                    if user_msg:
-                        history_dicts.append({"role": "user", "content": user_msg})
-                    if assistant_msg:
-                        history_dicts.append({"role": "assistant", "content": assistant_msg})
-            
-            # Process with backend
-            updated_history_dicts = await self.assistant.run_conversation(message, history_dicts)
-            
-            # Extract products
-            products = self.extract_products_from_state(updated_history_dicts)
-            
-            # Extract cart items
-            cart_items = self.extract_cart_from_state(updated_history_dicts)
-            
-            if products:
-                self.current_products = products
-            
-            if cart_items:
-                self.current_cart = cart_items
-            
-            products_html = self.create_products_grid_html(products) if products else self.create_empty_products_html()
-            cart_html = self.create_direct_cart_display(cart_items) if cart_items else self.create_direct_cart_display([])
-            
-            # Show virtual try-on sidebar if cart has items
-            sidebar_visible = len(cart_items) > 0
-            remove_controls_visible = len(cart_items) > 0
-            
-            # Get remove button updates
-            row_updates, button_updates = self.get_remove_button_updates(cart_items)
-            
-            return updated_history_dicts, products_html, cart_html, gr.update(visible=sidebar_visible), gr.update(visible=remove_controls_visible), gr.update(visible=remove_controls_visible), *row_updates, *button_updates
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            error_msg = "I encountered an error. Please try again."
-            error_history = history + [
-                {"role": "user", "content": message}, 
-                {"role": "assistant", "content": error_msg}
-            ]
-            # Get empty remove button updates
-            row_updates, button_updates = self.get_remove_button_updates([])
-            return error_history, self.create_error_html(str(e)), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
-
-    def create_assistify_css(self):
-        """🎨 Assistify-Inspired CSS - Professional AI Startup Design"""
-        return """
-        /* 🎨 ASSISTIFY COLOR SYSTEM */
-        :root {
-            /* Primary Gradient (Pink to Orange like Assistify) */
-            --gradient-primary: linear-gradient(135deg, #FF6B9D 0%, #FFA06B 50%, #FFD06B 100%);
-            --gradient-secondary: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            --gradient-accent: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-            
-            /* Dark Theme (Navy/Purple like Assistify) */
-            --bg-primary: #0F0F23;
-            --bg-secondary: #1A1A2E;
-            --bg-tertiary: #16213E;
-            --bg-card: rgba(26, 26, 46, 0.8);
-            
-            /* Glassmorphism */
-            --glass-bg: rgba(255, 255, 255, 0.05);
-            --glass-border: rgba(255, 255, 255, 0.1);
-            --glass-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-            
-            /* Text */
-            --text-primary: #FFFFFF;
-            --text-secondary: #B8B8D1;
-            --text-muted: #8B8BA7;
-            
-            /* Accents */
-            --accent-cyan: #4ECDC4;
-            --accent-pink: #FF6B9D;
-            --accent-purple: #667eea;
-            
-            /* Spacing */
-            --space-xs: 0.5rem;
-            --space-sm: 1rem;
-            --space-md: 1.5rem;
-            --space-lg: 2rem;
-            --space-xl: 3rem;
+            /* Spacing */
+            --space-xs: 0.5rem;
+            --space-sm: 1rem;
+            --space-md: 1.5rem;
+            --space-lg: 2rem;
+            --space-xl: 3rem;
             
             /* Border Radius */
             --radius-sm: 8px;
@@ -765,6 +805,22 @@ class AssistifyUI:
             color: #FFFFFF !important;
         }
         
+        /* Chat avatars are drawn by CSS instead of Chatbot avatar_images */
+        .chat-section .message.user::before,
+        .chat-section .message.bot::before {
+            display: block;
+            margin-bottom: 4px;
+            font-size: 1.1em;
+        }
+        
+        .chat-section .message.user::before {
+            content: "👤";
+        }
+        
+        .chat-section .message.bot::before {
+            content: "🤖";
+        }
+        
         .message .markdown {
             color: #FFFFFF !important;
         }
@@ -1247,6 +1303,10 @@ class AssistifyUI:
         }
         
         .tryon-item img {
+            max-width: 100%;
+            height: auto;
+            border-radius: 8px;
+            margin: 10px 0;
             border: 2px solid rgba(255, 255, 255, 0.3);
             box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
         }
@@ -1393,133 +1453,659 @@ class AssistifyUI:
                 gap: var(--space-md);
             }
             
-            .cart-item-image {
-                width: 100%;
-                height: 200px;
-            }
+            .cart-item-image {
+                width: 100%;
+                height: 200px;
+            }
+            
+            .cart-item-pricing {
+                align-items: flex-start;
+                width: 100%;
+            }
+            
+            .cart-actions {
+                flex-direction: column;
+            }
+            
+            .primary-btn,
+            .secondary-btn {
+                width: 100%;
+            }
+        }
+        """
+
+_HERO_HTML = """
+        <div class="assistify-hero">
+            <div class="hero-content">
+                
+                <h1 class="hero-title">
+                    🛍️ Outfitter.ai <span class="gradient-text">AI Assistant</span>
+                </h1>
+                
+                <p class="hero-subtitle">
+                    Your AI-powered shopping assistant with intelligent product discovery.
+                    Seamlessly connect to multiple stores for comprehensive assistance.
+                </p>
+                
+            </div>
+        </div>
+        """
+
+
+# Process-wide assistant: the LangGraph workflow is compiled once, not per UI instance.
+# The backend (LLM clients, agents, scrapers) is imported on first use, so the UI
+# can start serving before that stack is loaded.
+_assistant: Optional["OutfitterAssistant"] = None
+_assistant_lock = threading.Lock()
+
+
+def get_assistant() -> "OutfitterAssistant":
+    """Return the shared OutfitterAssistant, importing the backend and building its graph on first use"""
+    global _assistant
+    if _assistant is None:
+        with _assistant_lock:
+            if _assistant is None:
+                from main import OutfitterAssistant
+                assistant = OutfitterAssistant()
+                assistant.setup_graph()
+                _assistant = assistant
+    return _assistant
+
+
+def _image_extension(image_bytes: bytes, mime_type: Optional[str] = None) -> str:
+    """File extension for an image, from its MIME type if known, else its magic bytes"""
+    if mime_type in _IMAGE_MIME_EXTENSIONS:
+        return _IMAGE_MIME_EXTENSIONS[mime_type]
+    for magic, extension in _IMAGE_MAGIC_EXTENSIONS:
+        if image_bytes.startswith(magic):
+            return extension
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return ".webp"
+    return ".jpg"
+
+
+def _prune_tryon_outputs(max_files: int = TRYON_OUTPUT_MAX_FILES):
+    """Delete all but the `max_files` most recently used images in TRYON_OUTPUT_DIR"""
+    try:
+        entries = [entry for entry in os.scandir(TRYON_OUTPUT_DIR) if entry.is_file()]
+    except OSError:
+        return
+    if len(entries) <= max_files:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[max_files:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _save_tryon_image(image_b64: str) -> str:
+    """Write a base64 (or data URL) try-on image to TRYON_OUTPUT_DIR and return its Gradio file URL"""
+    mime_type = None
+    if image_b64.startswith("data:"):
+        header, _, image_b64 = image_b64.partition(",")
+        mime_type = header[5:].split(";", 1)[0]
+    image_bytes = base64.b64decode(image_b64)
+    filename = f"{hashlib.blake2b(image_bytes, digest_size=16).hexdigest()}{_image_extension(image_bytes, mime_type)}"
+    path = os.path.join(TRYON_OUTPUT_DIR, filename)
+    if os.path.exists(path):
+        # Mark as recently used so pruning keeps it
+        os.utime(path)
+    else:
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+        _prune_tryon_outputs()
+    return f"/gradio_api/file={path}"
+
+
+# Clear out images left over from earlier runs beyond the cap
+_prune_tryon_outputs()
+
+
+# Same substitutions as html.escape(s, quote=True), applied in a single str.translate pass
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+
+@lru_cache(maxsize=256)
+def _safe_escape(value: str) -> str:
+    """HTML-escape a product/cart field; product names recur across renders, so results are cached.
+    Callers pass str(field) so unhashable values (lists, dicts) can still be escaped."""
+    return value.translate(_HTML_ESCAPE_TABLE)
+
+
+@lru_cache(maxsize=512)
+def _render_product_card(index: int, name: str, price: str, url: str, image_url: str, store: str, is_on_sale: bool) -> str:
+    """Render one product card; memoized since the same products re-render across follow-up turns"""
+    return _PRODUCT_CARD_TEMPLATE % {
+        "index": index,
+        "name": _safe_escape(name),
+        "price": _safe_escape(price),
+        "url": url,
+        "image_url": image_url,
+        "store": _safe_escape(store),
+        "sale_badge": _SALE_BADGE_HTML if is_on_sale else "",
+    }
+
+
+def _history_from_message(msg: Dict[str, Any]) -> Tuple[Dict[str, Any], ...]:
+    return (msg,) if "role" in msg and "content" in msg else ()
+
+
+def _history_from_pair(msg: List) -> Tuple[Dict[str, Any], ...]:
+    if len(msg) != 2:
+        return ()
+    return tuple({"role": role, "content": content} for role, content in zip(("user", "assistant"), msg) if content)
+
+
+def _no_history(msg: Any) -> Tuple:
+    return ()
+
+
+# Chat history entry type -> role/content dicts it expands to (messages format or legacy [user, assistant] pairs)
+_HISTORY_NORMALIZERS = {dict: _history_from_message, list: _history_from_pair}
+
+
+def _normalize_history(history: List) -> List[Dict[str, Any]]:
+    """Convert chat history to role/content dicts, dropping entries of any other shape"""
+    return [entry for msg in history for entry in _HISTORY_NORMALIZERS.get(type(msg), _no_history)(msg)]
+
+
+def _is_noop_update(value: Any) -> bool:
+    """True for gr.skip()/gr.update() with no changes"""
+    return isinstance(value, dict) and value.get("__type__") == "update" and len(value) == 1
+
+
+def _merge_updates(pending: Optional[Tuple], update: Tuple) -> Tuple:
+    """Coalesce two output tuples, keeping the newest real value for each output"""
+    if pending is None:
+        return update
+    return tuple(old if _is_noop_update(new) else new for old, new in zip(pending, update))
+
+
+async def throttle_updates(updates: AsyncIterator[Tuple], min_interval: float = STREAM_MIN_INTERVAL) -> AsyncIterator[Tuple]:
+    """
+    Throttle a stream of output tuples so the browser re-renders at most once per
+    `min_interval`. Updates arriving in between are merged and flushed with the
+    next emit; the final state is always delivered.
+    """
+    last_emit = float("-inf")
+    pending = None
+    
+    async for update in updates:
+        pending = _merge_updates(pending, update)
+        now = time.monotonic()
+        if now - last_emit >= min_interval:
+            yield pending
+            pending = None
+            last_emit = now
+    
+    if pending is not None:
+        yield pending
+
+
+class AssistifyUI:
+    def __init__(self):
+        self.conversation_history = []
+        self.current_products = []
+        self.current_cart = []
+        self.current_user_photo = None
+        self.pending_cart_removal = None  # Track pending cart removal
+        self._virtual_tryon_agent = None  # created on first try-on request
+        
+        # Memoized backend turns: cache key -> (stored at, assistant replies, backend state, products)
+        self._conversation_cache: "OrderedDict[str, Tuple]" = OrderedDict()
+        
+        # Rendered products grids: products signature -> HTML
+        self._products_html_cache: "OrderedDict[int, str]" = OrderedDict()
+    
+    @property
+    def assistant(self) -> "OutfitterAssistant":
+        """Shared backend, loaded when the first conversation or cart action needs it"""
+        return get_assistant()
+    
+    @staticmethod
+    def _render_signature(items: List[Dict[str, Any]]) -> int:
+        """Cheap change-detection key for a list of product/cart dicts"""
+        return hash(repr(items))
+    
+    @staticmethod
+    def _snapshot_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a backend state deeply enough that cart removals (list.pop) don't alias it"""
+        return {**state, "selected_products": list(state.get("selected_products", []))}
+    
+    def _conversation_cache_key(self, message: str, history: List[Dict[str, str]]) -> str:
+        """
+        Key a turn on the message, the prior history and the whole backend state it
+        starts from - the same state a cache hit restores - so a reply is only
+        replayed after an identical prior turn (cart, products, search criteria, ...).
+        The message is compared case- and whitespace-insensitively, so a resubmitted
+        prompt like "Black hoodies " hits the entry for "black hoodies".
+        """
+        last_state = self.assistant._last_state or {}
+        normalized_message = " ".join(message.casefold().split())
+        payload = json.dumps(
+            [normalized_message, history, last_state],
+            default=str,
+            sort_keys=True,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+    
+    async def _stream_conversation_cached(self, message: str, history: List[Dict[str, str]]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run a turn through the backend, replaying a memoized result when the same turn was seen before.
+        Yields the backend's stream_conversation events: ("node", (name, update)) while the
+        graph runs, then ("history", updated_history).
+        """
+        cache_key = self._conversation_cache_key(message, history)
+        cached = self._conversation_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] > CONVERSATION_CACHE_TTL:
+            # Expired: drop it and run the turn again for fresh results
+            del self._conversation_cache[cache_key]
+            cached = None
+        if cached is not None:
+            self._conversation_cache.move_to_end(cache_key)
+            _, replies, last_state, self.assistant.last_products = cached
+            self.assistant._last_state = self._snapshot_state(last_state)
+            print(f"⚡ Conversation cache hit for: '{message}'")
+            # Echo the user's message as typed; only the replies come from the cache
+            yield "history", history + [{"role": "user", "content": message}] + replies
+            return
+        
+        state_before = self.assistant._last_state
+        updated_history = history
+        async with _LLM_SEM:
+            async for kind, payload in self.assistant.stream_conversation(message, history):
+                if kind == "history":
+                    updated_history = payload
+                else:
+                    yield kind, payload
+        
+        # The backend only replaces _last_state when the graph succeeded; don't memoize error replies
+        if self.assistant._last_state is not state_before:
+            self._conversation_cache[cache_key] = (
+                time.monotonic(),
+                updated_history[len(history) + 1:],  # everything after the user's message
+                self._snapshot_state(self.assistant._last_state),
+                self.assistant.last_products,
+            )
+            if len(self._conversation_cache) > CONVERSATION_CACHE_SIZE:
+                self._conversation_cache.popitem(last=False)
+        
+        yield "history", updated_history
+    
+    @staticmethod
+    def _products_signature(products: List[Dict[str, Any]]) -> int:
+        """Change-detection key for the products grid, over every field the cards render"""
+        return hash(repr([tuple(p.get(field) for field in _PRODUCT_RENDER_FIELDS) for p in products]))
+    
+    @staticmethod
+    def reset_render_state(render_state: Dict[str, Any]):
+        """Forget what a session's panels show so its next turn re-renders them"""
+        render_state.clear()
+    
+    @staticmethod
+    def _safe_price_calculation(item: Dict[str, Any]) -> float:
+        """Safely calculate price * quantity, handling string prices"""
+        try:
+            price = item.get('price', 0)
+            quantity = item.get('quantity', 1)
+            
+            # Convert price to float if it's a string
+            if isinstance(price, str):
+                # Remove currency symbols and convert to float
+                price_str = price.replace('$', '').replace(',', '').strip()
+                price = float(price_str)
+            elif not isinstance(price, (int, float)):
+                price = 0.0
+            
+            # Ensure quantity is numeric
+            if not isinstance(quantity, (int, float)):
+                quantity = 1
+            
+            return price * quantity
+        except (ValueError, TypeError):
+            return 0.0
+        
+    def extract_products_from_state(self, conversation_result: List[Dict]) -> List[Dict[str, Any]]:
+        """Extract products from conversation state"""
+        try:
+            # OutfitterAssistant always defines last_products and _last_state
+            last_products = self.assistant.last_products
+            if last_products:
+                print(f"🔍 Found {len(last_products)} products")
+                return last_products
+            
+            last_state = self.assistant._last_state
+            products = last_state.get('products_shown') or last_state.get('search_results', [])
+            if products:
+                print(f"🔍 Found {len(products)} products from state")
+                return products
+            
+            return []
+            
+        except Exception as e:
+            print(f"❌ Error extracting products: {e}")
+            return []
+
+    def extract_cart_from_state(self, conversation_result: List[Dict]) -> List[Dict[str, Any]]:
+        """Extract cart items from conversation state"""
+        try:
+            print(f"🔍 DEBUG: Extracting cart from state...")
+            last_state = self.assistant._last_state
+            if last_state:
+                print(f"🔍 DEBUG: _last_state keys: {list(last_state.keys())}")
+                cart_items = last_state.get('selected_products', [])
+                print(f"🔍 DEBUG: selected_products from state: {len(cart_items)} items")
+                if cart_items:
+                    print(f"🛒 Found {len(cart_items)} cart items")
+                    for i, item in enumerate(cart_items):
+                        print(f"   {i+1}. {item.get('name', 'Unknown')} - {item.get('price', 'N/A')}")
+                    return cart_items
+                else:
+                    print("🛒 No cart items in selected_products")
+            else:
+                print("🛒 No _last_state available")
+            
+            print("🛒 Returning empty cart")
+            return []
+            
+        except Exception as e:
+            logger.exception("Error extracting cart: %s", e)
+            return []
+    
+    async def handle_cart_removal(self, index: int) -> Tuple[List, str, str, gr.Column]:
+        """Handle cart item removal by index"""
+        print(f"🗑️ Handling cart removal for index: {index}")
+        
+        # Get current cart from state
+        cart_items = self.extract_cart_from_state([])
+        
+        if 0 <= index < len(cart_items):
+            # Remove the item
+            removed_item = cart_items.pop(index)
+            print(f"   ✅ Removed item: {removed_item.get('name', 'Unknown')}")
+            
+            # Update the assistant's state
+            self.assistant._last_state['selected_products'] = cart_items
+            
+            # Create removal message
+            message = f"remove item #{index + 1} from cart"
+            
+            # Process with backend to get proper response
+            try:
+                result = await self.assistant.run_conversation(message, self.conversation_history)
+                self.conversation_history = result.get("messages", [])
+                
+                # Extract updated cart
+                updated_cart = result.get("selected_products", cart_items)
+                
+                return (
+                    self.conversation_history,
+                    self.create_empty_products_html(),
+                    self.format_cart_page_html_simple(updated_cart),
+                    gr.update(visible=False)
+                )
+            except Exception as e:
+                print(f"❌ Error processing cart removal: {e}")
+                return (
+                    self.conversation_history,
+                    self.create_empty_products_html(),
+                    self.format_cart_page_html_simple(cart_items),
+                    gr.update(visible=False)
+                )
+        else:
+            print(f"❌ Invalid index for removal: {index}")
+            return (
+                self.conversation_history,
+                self.create_empty_products_html(),
+                self.format_cart_page_html_simple(cart_items),
+                gr.update(visible=False)
+            )
+
+    def handle_direct_removal(self, item_index: int, history: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], str, str, gr.update, gr.update, *List[gr.update]]:
+        """Handle direct removal of cart item by index"""
+        try:
+            # Get current cart items
+            cart_items = self.extract_cart_from_state([])
+            
+            if not cart_items or item_index >= len(cart_items):
+                error_msg = "Item not found in cart."
+                error_history = history + [
+                    {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
+                    {"role": "assistant", "content": error_msg}
+                ]
+                # Get empty remove button updates
+                row_updates, button_updates = self.get_remove_button_updates([])
+                return error_history, self.create_error_html(error_msg), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
+            
+            # Remove the item
+            removed_item = cart_items.pop(item_index)
+            removed_item_name = removed_item.get('name', 'Unknown Product')
+            
+            # Update the assistant's state
+            self.assistant._last_state['selected_products'] = cart_items
+            
+            # Update current cart
+            self.current_cart = cart_items
+            
+            # Create success message
+            success_msg = f"✅ Removed '{removed_item_name}' from your cart."
+            updated_history = history + [
+                {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
+                {"role": "assistant", "content": success_msg}
+            ]
+            
+            # Create updated displays
+            products_html = self.create_products_grid_html(self.current_products) if self.current_products else self.create_empty_products_html()
+            cart_html = self.create_direct_cart_display(cart_items)
+            
+            # Show virtual try-on sidebar if cart has items
+            sidebar_visible = len(cart_items) > 0
+            remove_controls_visible = len(cart_items) > 0
+            
+            # Get remove button updates
+            row_updates, button_updates = self.get_remove_button_updates(cart_items)
+            
+            return updated_history, products_html, cart_html, gr.update(visible=sidebar_visible), gr.update(visible=remove_controls_visible), *row_updates, *button_updates
+            
+        except Exception as e:
+            logger.exception("Error in direct removal: %s", e)
+            error_msg = "I encountered an error removing the item. Please try again."
+            error_history = history + [
+                {"role": "user", "content": f"Remove item #{item_index + 1}"}, 
+                {"role": "assistant", "content": error_msg}
+            ]
+            # Get empty remove button updates
+            row_updates, button_updates = self.get_remove_button_updates([])
+            return error_history, self.create_error_html(str(e)), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
+
+    @staticmethod
+    def _pending_chat(history: List, message: str, progress_text: str) -> List:
+        """Chat view for a turn in progress: the user's message plus a pending assistant reply"""
+        return history + [
+            {"role": "user", "content": message},
+            gr.ChatMessage(role="assistant", content=progress_text, metadata={"status": "pending"}),
+        ]
+    
+    async def handle_conversation(self, message: str, history: List, render_state: Dict[str, Any]) -> AsyncIterator[Tuple]:
+        """
+        Handle conversation with product and cart extraction.
+        Streams updates: the user's message (with a pending assistant reply) is
+        shown straight away, then the final turn once the backend finishes.
+        render_state is the session's record of what its products/cart panels
+        show ("products"/"cart" signatures); it is updated in place.
+        """
+        
+        if not message.strip():
+            # Nothing to send: leave the chat and every panel as they are
+            yield tuple([gr.skip()] * 25)
+            return
+        
+        # Show the user's message immediately while the backend is working;
+        # the other outputs (products, cart, sidebar, remove rows/buttons) stay as they are
+        yield self._pending_chat(history, message, "…"), *([gr.skip()] * 24)
+        
+        try:
+            # The first turn may arrive before the warm-up finishes: wait for the backend
+            # import/graph build in a worker thread rather than blocking the event loop
+            if _assistant is None:
+                await asyncio.to_thread(get_assistant)
+            
+            # Convert message format
+            history_dicts = _normalize_history(history)
+            
+            # Process with backend (memoized per message/history/cart), showing search
+            # results as soon as the search node finishes rather than at the end of the turn
+            # The backend only sees a sliding window of recent messages so prompt size stays
+            # bounded in long sessions; the earlier messages are re-attached for display
+            recent_history = history_dicts[-BACKEND_HISTORY_MESSAGES:]
+            earlier_history = history_dicts[:len(history_dicts) - len(recent_history)]
+            updated_history_dicts = history_dicts
+            async for kind, payload in self._stream_conversation_cached(message, recent_history):
+                if kind == "history":
+                    updated_history_dicts = earlier_history + payload
+                    continue
+                
+                node_name, update = payload
+                update = update or {}
+                
+                # Show the latest node's message (e.g. "I found 12 products...") in the pending reply
+                chat_update = gr.skip()
+                node_messages = update.get("messages") or []
+                progress_text = getattr(node_messages[-1], "content", None) if node_messages else None
+                if isinstance(progress_text, str) and progress_text:
+                    chat_update = self._pending_chat(history, message, progress_text)
+                
+                products_update = gr.skip()
+                found = update.get("search_results") if node_name == "parallel_searcher" else None
+                if found:
+                    found_sig = self._products_signature(found)
+                    if found_sig != render_state.get("products"):
+                        render_state["products"] = found_sig
+                        products_update = self.create_products_grid_html(found)
+                
+                if not (_is_noop_update(chat_update) and _is_noop_update(products_update)):
+                    yield chat_update, products_update, *([gr.skip()] * 23)
+            
+            # Extract products
+            products = self.extract_products_from_state(updated_history_dicts)
+            
+            # Extract cart items
+            cart_items = self.extract_cart_from_state(updated_history_dicts)
             
-            .cart-item-pricing {
-                align-items: flex-start;
-                width: 100%;
-            }
+            if products:
+                self.current_products = products
             
-            .cart-actions {
-                flex-direction: column;
-            }
+            if cart_items:
+                self.current_cart = cart_items
             
-            .primary-btn,
-            .secondary-btn {
-                width: 100%;
-            }
-        }
-        """
+            # Only re-render panels whose contents changed this turn
+            products_sig = self._products_signature(products)
+            if products_sig == render_state.get("products"):
+                products_html = gr.skip()
+            else:
+                products_html = self.create_products_grid_html(products) if products else self.create_empty_products_html()
+                render_state["products"] = products_sig
+            
+            # The cart panel, sidebar/remove-controls visibility and remove rows/buttons
+            # all follow the cart, so an unchanged cart skips all of them
+            cart_sig = self._render_signature(cart_items)
+            if cart_sig == render_state.get("cart"):
+                yield updated_history_dicts, products_html, *([gr.skip()] * 23)
+                return
+            
+            cart_html = self.create_direct_cart_display(cart_items)
+            render_state["cart"] = cart_sig
+            
+            # Show virtual try-on sidebar if cart has items
+            sidebar_visible = len(cart_items) > 0
+            remove_controls_visible = len(cart_items) > 0
+            
+            # Get remove button updates
+            row_updates, button_updates = self.get_remove_button_updates(cart_items)
+            
+            yield updated_history_dicts, products_html, cart_html, gr.update(visible=sidebar_visible), gr.update(visible=remove_controls_visible), *row_updates, *button_updates
+            
+        except Exception as e:
+            logger.exception("handle_conversation failed: %s", e)
+            self.reset_render_state(render_state)
+            error_msg = "I encountered an error. Please try again."
+            error_history = history + [
+                {"role": "user", "content": message}, 
+                {"role": "assistant", "content": error_msg}
+            ]
+            # Get empty remove button updates
+            row_updates, button_updates = self.get_remove_button_updates([])
+            yield error_history, self.create_error_html(str(e)), self.create_direct_cart_display([]), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
 
-    def create_hero_html(self):
+    @staticmethod
+    def create_assistify_css():
+        """🎨 Assistify-Inspired CSS - Professional AI Startup Design"""
+        return _ASSISTIFY_CSS
+
+    @staticmethod
+    def create_hero_html():
         """🌟 Create Assistify-style hero header"""
-        return """
-        <div class="assistify-hero">
-            <div class="hero-content">
-                
-                <h1 class="hero-title">
-                    🛍️ Outfitter.ai <span class="gradient-text">AI Assistant</span>
-                </h1>
-                
-                <p class="hero-subtitle">
-                    Your AI-powered shopping assistant with intelligent product discovery.
-                    Seamlessly connect to multiple stores for comprehensive assistance.
-                </p>
-                
-            </div>
-        </div>
-        """
+        return _HERO_HTML
     
-    def create_empty_products_html(self):
+    @staticmethod
+    def create_empty_products_html():
         """Create empty products state"""
-        return """
-        <div class="products-section">
-            <div class="empty-state">
-                <div class="empty-state-icon">👕</div>
-                <h3 class="empty-state-title">Products will appear here</h3>
-                <p class="empty-state-text">Start by telling me what you're looking for...</p>
-            </div>
-        </div>
-        """
+        return _EMPTY_PRODUCTS_HTML
     
-    def create_product_card_html(self, product: Dict[str, Any], index: int) -> str:
+    @staticmethod
+    def create_product_card_html(product: Dict[str, Any], index: int) -> str:
         """Create product card"""
-        name = html.escape(product.get("name") or "Unknown Product")
-        price = html.escape(product.get("price") or "Price unavailable")
-        url = product.get("url") or "#"
-        image_url = product.get("image_url") or ""
-        store = html.escape(product.get("store_name") or "Unknown Store")
-        is_on_sale = product.get("is_on_sale", False)
-        
-        if not image_url:
-            image_url = "https://via.placeholder.com/400x400/1a1a2e/667eea?text=No+Image"
-        
-        sale_badge = '<div class="product-badge">🔥 SALE</div>' if is_on_sale else ""
-        
-        return f"""
-        <div class="product-card" data-index="{index}">
-            <div class="product-image-container">
-                <img 
-                    src="{image_url}" 
-                    alt="{name}"
-                    class="product-image"
-                    onerror="this.src='https://via.placeholder.com/400x400/1a1a2e/667eea?text=No+Image'"
-                />
-                {sale_badge}
-                <div class="store-badge">{store}</div>
-            </div>
-            
-            <div class="product-content">
-                <h3 class="product-title">{name}</h3>
-                <div class="product-price">{price}</div>
-                
-                <div class="product-actions">
-                    <a href="{url}" target="_blank" class="view-btn">
-                        <span>View Product</span>
-                        <span>→</span>
-                    </a>
-                </div>
-            </div>
-        </div>
-        """
+        return _render_product_card(
+            index,
+            str(product.get("name") or "Unknown Product"),
+            str(product.get("price") or "Price unavailable"),
+            str(product.get("url") or "#"),
+            str(product.get("image_url") or _PLACEHOLDER_IMAGE_URL),
+            str(product.get("store_name") or "Unknown Store"),
+            bool(product.get("is_on_sale", False)),
+        )
     
     def create_products_grid_html(self, products: List[Dict[str, Any]]) -> str:
-        """Create products grid"""
+        """Create products grid (memoized per product list, keyed by the rendered product fields)"""
         if not products:
             return self.create_empty_products_html()
         
+        cache_key = self._products_signature(products)
+        cached = self._products_html_cache.get(cache_key)
+        if cached is not None:
+            self._products_html_cache.move_to_end(cache_key)
+            return cached
+        
         header = f"""
         <div class="products-header">
             <div class="products-count">Found {len(products)} products</div>
         </div>
         """
         
-        cards = '<div class="products-grid">'
-        for index, product in enumerate(products, 1):
-            cards += self.create_product_card_html(product, index)
-        cards += '</div>'
+        cards = "".join(
+            self.create_product_card_html(product, index)
+            for index, product in enumerate(products, 1)
+        )
+        cards = f'<div class="products-grid">{cards}</div>'
         
-        return f"""
+        grid_html = f"""
         <div class="products-section">
             {header}
             {cards}
         </div>
         """
+        
+        self._products_html_cache[cache_key] = grid_html
+        if len(self._products_html_cache) > PRODUCTS_HTML_CACHE_SIZE:
+            self._products_html_cache.popitem(last=False)
+        return grid_html
     
-    def create_error_html(self, error: str) -> str:
-        """Create error state"""
-        return f"""
-        <div class="products-section">
-            <div class="empty-state">
-                <div class="empty-state-icon">⚠️</div>
-                <h3 class="empty-state-title">Something went wrong</h3>
-                <p class="empty-state-text">Please try your search again</p>
-            </div>
-        </div>
-        """
+    @staticmethod
+    def create_error_html(error: str) -> str:
+        """Create error state (the error text is logged, not shown)"""
+        return _ERROR_HTML
     
     def format_cart_page_html_with_buttons(self, cart_items: List[Dict[str, Any]]) -> Tuple[str, List[gr.Button]]:
         """Format cart page with individual remove buttons for each item"""
@@ -1791,27 +2377,19 @@ class AssistifyUI:
     def create_direct_cart_display(self, cart_items: List[Dict[str, Any]]) -> str:
         """Create cart display with X buttons on each item"""
         if not cart_items:
-            return """
-            <div class="cart-section">
-                <div class="empty-state">
-                    <div class="empty-state-icon">🛒</div>
-                    <h3 class="empty-state-title">Your cart is empty</h3>
-                    <p class="empty-state-text">Add some items to get started!</p>
-                </div>
-            </div>
-            """
+            return _EMPTY_CART_HTML
         
         total_items = len(cart_items)
         total_price = sum(self._safe_price_calculation(item) for item in cart_items)
         
-        cart_items_html = ""
+        cart_rows = []
         
         for index, item in enumerate(cart_items):
-            name = item.get('name', 'Unknown Product')
+            name = _safe_escape(str(item.get('name', 'Unknown Product')))
             price = item.get('price', 0)
             quantity = item.get('quantity', 1)
-            size = item.get('size', 'One Size')
-            store = item.get('store', 'Unknown Store')
+            size = _safe_escape(str(item.get('size', 'One Size')))
+            store = _safe_escape(str(item.get('store', 'Unknown Store')))
             image_url = item.get('image_url', '')
             
             # Format price safely
@@ -1825,10 +2403,10 @@ class AssistifyUI:
                     price_str = f"${price:.2f}"
                     item_total = price * quantity
                 else:
-                    price_str = str(price)
+                    price_str = _safe_escape(str(price))
                     item_total = 0
             except (ValueError, TypeError):
-                price_str = str(price)
+                price_str = _safe_escape(str(price))
                 item_total = 0
             
             # Handle image
@@ -1837,46 +2415,19 @@ class AssistifyUI:
             else:
                 image_html = '<div class="cart-item-placeholder">📦</div>'
             
-            cart_items_html += f"""
-            <div class="cart-item-card" data-index="{index}">
-                <div class="cart-item-image">
-                    {image_html}
-                </div>
-                
-                <div class="cart-item-content">
-                    <div class="cart-item-header">
-                        <h4 class="cart-item-name">{name}</h4>
-                        <div class="cart-item-actions">
-                            <div class="cart-item-number">#{index + 1}</div>
-                            <button class="cart-item-remove-btn" onclick="removeCartItem({index})" title="Remove item #{index + 1}" data-item-index="{index}">×</button>
-                        </div>
-                    </div>
-                    
-                    <div class="cart-item-details">
-                        <div class="cart-item-store">
-                            <span class="store-icon">🏪</span>
-                            <span class="store-name">{store}</span>
-                        </div>
-                        
-                        <div class="cart-item-specs">
-                            <span class="spec-item">
-                                <span class="spec-label">Size:</span>
-                                <span class="spec-value">{size}</span>
-                            </span>
-                            <span class="spec-item">
-                                <span class="spec-label">Qty:</span>
-                                <span class="spec-value">{quantity}</span>
-                            </span>
-                        </div>
-                    </div>
-                </div>
-                
-                <div class="cart-item-pricing">
-                    <div class="cart-item-price">{price_str}</div>
-                    <div class="cart-item-total">${item_total:.2f}</div>
-                </div>
-            </div>
-            """
+            cart_rows.append(_CART_ITEM_TEMPLATE % {
+                "index": index,
+                "number": index + 1,
+                "image_html": image_html,
+                "name": name,
+                "store": store,
+                "size": size,
+                "quantity": quantity,
+                "price_str": price_str,
+                "item_total": item_total,
+            })
+        
+        cart_items_html = "".join(cart_rows)
         
         cart_html = f"""
         <div class="cart-section">
@@ -1923,92 +2474,6 @@ class AssistifyUI:
                 </div>
             </div>
         </div>
-        
-        <script>
-        // Enhanced removeCartItem function for X buttons
-        window.removeCartItem = function(index) {{
-            console.log('X button clicked - removing item at index:', index);
-            
-            // Try multiple ways to find the message input
-            let messageInput = null;
-            const selectors = [
-                'textarea[placeholder*="Tell me what"]',
-                'textarea[placeholder*="Tell me"]',
-                'textarea[data-testid*="textbox"]',
-                'textarea',
-                'input[type="text"]'
-            ];
-            
-            for (const selector of selectors) {{
-                messageInput = document.querySelector(selector);
-                if (messageInput) break;
-            }}
-            
-            if (messageInput) {{
-                console.log('Found message input:', messageInput);
-                
-                // Set the message
-                const message = `remove item #${{index + 1}} from cart`;
-                messageInput.value = message;
-                messageInput.focus();
-                
-                // Trigger multiple events to ensure Gradio picks up the change
-                const events = ['input', 'change', 'keyup', 'keydown', 'blur'];
-                events.forEach(eventType => {{
-                    messageInput.dispatchEvent(new Event(eventType, {{ bubbles: true, cancelable: true }}));
-                }});
-                
-                // Try multiple ways to find the send button
-                let sendButton = null;
-                const buttonSelectors = [
-                    'button:has-text("Send")',
-                    'button[class*="neon-button"]',
-                    'button[type="submit"]',
-                    'button[data-testid*="send"]',
-                    'button:contains("Send")',
-                    'button'
-                ];
-                
-                for (const selector of buttonSelectors) {{
-                    const buttons = document.querySelectorAll(selector);
-                    for (const btn of buttons) {{
-                        if (btn.textContent.includes('Send') || btn.textContent.includes('send')) {{
-                            sendButton = btn;
-                            break;
-                        }}
-                    }}
-                    if (sendButton) break;
-                }}
-                
-                if (sendButton) {{
-                    console.log('Found send button:', sendButton);
-                    // Click the send button with a delay
-                    setTimeout(() => {{
-                        sendButton.click();
-                        console.log('Send button clicked for X button removal');
-                    }}, 300);
-                }} else {{
-                    console.error('Could not find send button');
-                    // Try to trigger form submission
-                    const form = messageInput.closest('form');
-                    if (form) {{
-                        form.submit();
-                    }}
-                }}
-            }} else {{
-                console.error('Could not find message input');
-                alert(`Remove item #${{index + 1}} from cart - Please type this in the chat`);
-            }}
-        }};
-        
-        // Ensure the function is available globally
-        if (typeof window !== 'undefined') {{
-            window.removeCartItem = window.removeCartItem || function(index) {{
-                console.log('Fallback removeCartItem called with index:', index);
-                alert(`Remove item #${{index + 1}} from cart - Please type this in the chat`);
-            }};
-        }}
-        </script>
         """
         
         return cart_html
@@ -2418,15 +2883,7 @@ class AssistifyUI:
     def format_cart_page_html_simple(self, cart_items: List[Dict[str, Any]]) -> str:
         """Simple cart display without JavaScript - just shows items with text instructions"""
         if not cart_items:
-            return """
-            <div class="cart-section">
-                <div class="empty-state">
-                    <div class="empty-state-icon">🛒</div>
-                    <h3 class="empty-state-title">Your cart is empty</h3>
-                    <p class="empty-state-text">Add some items to get started!</p>
-                </div>
-            </div>
-            """
+            return _EMPTY_CART_HTML
         
         total_items = len(cart_items)
         total_price = sum(self._safe_price_calculation(item) for item in cart_items)
@@ -2705,10 +3162,10 @@ class AssistifyUI:
             
             # Import and use the actual virtual try-on agent
             try:
-                from agents.conversation_agents.virtualTryOnAgent import VirtualTryOnAgent
-                
-                # Create virtual try-on agent
-                virtual_tryon_agent = VirtualTryOnAgent()
+                if self._virtual_tryon_agent is None:
+                    from agents.conversation_agents.virtualTryOnAgent import VirtualTryOnAgent
+                    self._virtual_tryon_agent = VirtualTryOnAgent()
+                virtual_tryon_agent = self._virtual_tryon_agent
                 
                 # Prepare state for virtual try-on
                 state = {
@@ -2740,8 +3197,7 @@ class AssistifyUI:
                                 <h4>🎭 {category.title()} Try-On</h4>
                                 <div class='tryon-item'>
                                     <p><strong>{item.get('name', 'Unknown Item')}</strong> - {item.get('price', 'N/A')}</p>
-                                    <img src="data:image/jpeg;base64,{tryon_image}" 
-                                         style="max-width: 100%; height: auto; border-radius: 8px; margin: 10px 0;" />
+                                    <img src="{_save_tryon_image(tryon_image)}" />
                                 </div>
                             </div>
                             """
@@ -2769,6 +3225,8 @@ def create_assistify_interface():
     """🚀 Create Assistify-inspired interface"""
     
     ui = AssistifyUI()
+    # Load the backend alongside server startup instead of on the first request
+    threading.Thread(target=get_assistant, name="assistant-warmup", daemon=True).start()
     
     with gr.Blocks(
         theme=gr.themes.Soft(
@@ -2776,12 +3234,14 @@ def create_assistify_interface():
             secondary_hue="pink",
             neutral_hue="slate",
         ),
-        css=ui.create_assistify_css(),
+        css=_ASSISTIFY_CSS,
         title="Outfitter.ai - AI Shopping Assistant",
+        head=_PAGE_SCRIPT_HTML,
+        analytics_enabled=False,
     ) as interface:
         
         # Hero Header
-        gr.HTML(ui.create_hero_html())
+        gr.HTML(_HERO_HTML)
         
         # Main Container
         with gr.Column(elem_classes=["main-container"]):
@@ -2795,25 +3255,15 @@ def create_assistify_interface():
                         with gr.Column(scale=2, min_width=500):
                             gr.HTML('<div class="section-header"><span class="icon">💬</span>Chat with AI</div>')
                             
-                            chatbot = gr.Chatbot(
-                                label="",
-                                height=700,
-                                show_label=False,
-                                avatar_images=("👤", "🤖"),
-                                bubble_full_width=False,
-                                type="messages",
-                                elem_classes=["chat-section"]
-                            )
+                            chatbot = gr.Chatbot(**_CHATBOT_KWARGS)
+                            # Server-side copy of the conversation, so a turn only uploads the new message
+                            history_state = gr.State([])
+                            # What this session's products/cart panels currently show, so unchanged
+                            # panels are skipped; a reload or new tab starts empty and re-renders
+                            render_state = gr.State({})
 
                             # Input row (full width)
-                            msg = gr.Textbox(
-                                label="",
-                                placeholder="Tell me what you're looking for...",
-                                lines=3,
-                                show_label=False,
-                                scale=1,
-                                elem_classes=["large-text-input"],
-                            )
+                            msg = gr.Textbox(**_MESSAGE_BOX_KWARGS)
 
                             # Buttons row (side-by-side)
                             with gr.Row(equal_height=True):
@@ -2824,7 +3274,7 @@ def create_assistify_interface():
                         with gr.Column(scale=3, min_width=600):
                             gr.HTML('<div class="section-header"><span class="icon">🛍️</span>Products Found</div>')
                             products_display = gr.HTML(
-                                value=ui.create_empty_products_html()
+                                value=_EMPTY_PRODUCTS_HTML
                             )
                 
                 # Cart Tab
@@ -2836,7 +3286,7 @@ def create_assistify_interface():
                             
                             # Cart display with individual remove buttons
                             cart_display = gr.HTML(
-                                value='<div class="empty-state"><div class="empty-state-icon">🛒</div><h3 class="empty-state-title">Your cart is empty</h3></div>'
+                                value=_EMPTY_CART_HTML
                             )
                             
                             # Individual remove buttons for each cart item
@@ -2868,7 +3318,7 @@ def create_assistify_interface():
                             
                             # Photo Upload Section
                             with gr.Group():
-                                gr.Markdown("### 📸 Upload Your Photo")
+                                gr.HTML(_TRYON_UPLOAD_HEADER_HTML)
                                 photo_upload = gr.File(
                                     label="Upload your photo",
                                     file_types=["image"],
@@ -2884,52 +3334,69 @@ def create_assistify_interface():
                                 tryon_btn = gr.Button("🎭 Try On Items", variant="secondary", visible=False)
                             
                             # Instructions
-                            gr.Markdown("""
-                            <div style="color: white;">
-                            **How it works:**
-                            1. Upload a clear photo of yourself
-                            2. Click "Try On Items" to see how your cart items look on you
-                            3. The AI will overlay the clothing onto your photo realistically
-                            </div>
-                            """)
+                            gr.HTML(_TRYON_INSTRUCTIONS_HTML, elem_classes=["tryon-instructions"])
         
         # Event Handlers
-        async def send_message(message, history):
-            return await ui.handle_conversation(message, history)
+        async def send_message(message, history, render_state):
+            # The message box is cleared with the first update only; the history
+            # and render states are stored once the turn finishes (never the pending reply)
+            if not message.strip():
+                # Short-circuit before the conversation pipeline and throttling start
+                yield (*([gr.skip()] * 25), "", gr.skip(), gr.skip())
+                return
+            
+            msg_update = ""
+            chat_history = history
+            async for update in throttle_updates(ui.handle_conversation(message, history, render_state)):
+                yield (*update, msg_update, gr.skip(), gr.skip())
+                msg_update = gr.skip()
+                chat_history = update[0]
+            yield (*([gr.skip()] * 26), chat_history, render_state)
         
         def clear_conversation():
             # Get empty remove button updates
             row_updates, button_updates = ui.get_remove_button_updates([])
-            return [], ui.create_empty_products_html(), ui.create_direct_cart_display([]), "", gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates
+            return [], _EMPTY_PRODUCTS_HTML, _EMPTY_CART_HTML, "", gr.update(visible=False), gr.update(visible=False), *row_updates, *button_updates, [], {}
         
         
         # Bind Events
         send_btn.click(
             send_message,
-            inputs=[msg, chatbot],
-            outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container, cart_remove_buttons_container] + remove_rows + remove_btn_components
-        ).then(lambda: "", outputs=[msg])
+            inputs=[msg, history_state, render_state],
+            outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container] + remove_rows + remove_btn_components + [msg, history_state, render_state],
+            concurrency_id="llm",
+            concurrency_limit=LLM_CONCURRENCY,
+            show_progress="hidden"
+        )
         
         # Bind individual remove button events
         def create_remove_handler(index):
-            def remove_handler():
-                return ui.handle_direct_removal(index, [])
+            def remove_handler(history):
+                update = ui.handle_direct_removal(index, history)
+                # Both panels were re-rendered outside handle_conversation, so the
+                # session's render state starts over
+                return (*update, update[0], {})
             return remove_handler
         
         for i, (remove_row, remove_btn) in enumerate(remove_buttons):
             remove_btn.click(
                 create_remove_handler(i),
-                inputs=[],
-                outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container, cart_remove_buttons_container] + remove_rows + remove_btn_components
+                inputs=[history_state],
+                outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container] + remove_rows + remove_btn_components + [history_state, render_state],
+                concurrency_id="ui",
+                concurrency_limit=16
             )
         
         msg.submit(
             send_message,
-            inputs=[msg, chatbot],
-            outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container, cart_remove_buttons_container] + remove_rows + remove_btn_components
-        ).then(lambda: "", outputs=[msg])
+            inputs=[msg, history_state, render_state],
+            outputs=[chatbot, products_display, cart_display, virtual_tryon_sidebar, cart_remove_buttons_container] + remove_rows + remove_btn_components + [msg, history_state, render_state],
+            concurrency_id="llm",
+            concurrency_limit=LLM_CONCURRENCY,
+            show_progress="hidden"
+        )
         
-        clear_btn.click(clear_conversation, outputs=[chatbot, products_display, cart_display, msg, virtual_tryon_sidebar, cart_remove_buttons_container, cart_remove_buttons_container] + remove_rows + remove_btn_components)
+        clear_btn.click(clear_conversation, outputs=[chatbot, products_display, cart_display, msg, virtual_tryon_sidebar, cart_remove_buttons_container] + remove_rows + remove_btn_components + [history_state, render_state], queue=False)
         
         # Virtual Try-On Event Handlers
         def handle_photo_upload(photo_path):
@@ -2965,7 +3432,8 @@ def create_assistify_interface():
         upload_btn.click(
             handle_photo_upload,
             inputs=[photo_upload],
-            outputs=[tryon_btn, tryon_results]
+            outputs=[tryon_btn, tryon_results],
+            queue=False
         )
         
         tryon_btn.click(
@@ -2973,6 +3441,16 @@ def create_assistify_interface():
             outputs=[tryon_results]
         )
     
+    # Chat/LLM events and cart/UI events run in separate concurrency groups (set
+    # per event above) so slow LLM turns can't block cart updates; anything else
+    # gets a single worker.
+    interface.queue(
+        default_concurrency_limit=1,
+        max_size=32,
+        status_update_rate="auto",
+        api_open=False
+    )
+    
     return interface
 
 if __name__ == "__main__":
@@ -2980,5 +3458,8 @@ if __name__ == "__main__":
     interface.launch(
         server_name="0.0.0.0",
         server_port=7863,
-        share=False
+        share=False,
+        max_threads=40,
+        # Gzip the large product/cart HTML payloads (event streams are left uncompressed)
+        app_kwargs={"middleware": [Middleware(GZipMiddleware, minimum_size=1024)]}
     )
\ No newline at end of file
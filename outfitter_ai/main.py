@@ -2,21 +2,32 @@
 Final version Ready.
 """
 
+import io
+import logging
 import os
 import re
+import json
+import sys
+import time
 import uuid
+import threading
 import asyncio 
-from typing import Dict, Any, List
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, List, Tuple, AsyncIterator
 from datetime import datetime
 from dotenv import load_dotenv
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import AIMessage
+from langgraph.cache.memory import InMemoryCache
+from langgraph.types import CachePolicy
+from langchain_core.messages import AIMessage, HumanMessage
 from agents.conversation_agents.needsAnalyzer import NeedsAnalyzer
 from agents.conversation_agents.simpleClarificationAsker import SimpleClarificationAsker
 
-from tools.scraping_tools import search_products_google_only
+from tools.scraping_tools import search_products_google_only_async
 
 from agents.state import OutfitterState
 from agents.intent_classifier import RobustIntentClassifier
@@ -32,11 +43,149 @@ from agents.conversation_agents.cartManager import CartManager
 # Load environment variables
 load_dotenv()
 
+# Per-turn tracing is logged at DEBUG; set OUTFITTER_LOG_LEVEL=DEBUG to see it
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("OUTFITTER_LOG_LEVEL", "INFO").upper())
+
+# Max products per verifier prompt; larger result sets are split along store
+# boundaries and the batches verified concurrently
+VERIFIER_BATCH_SIZE = 25
+
+# Scrape results are reused for identical search criteria within this window
+SEARCH_CACHE_TTL = 300
+
+# Verifier results (the URLs kept) per (normalized request, product URL set);
+# they expire with the search results they were computed for
+VERIFIER_CACHE_SIZE = 256
+VERIFIER_CACHE_TTL = SEARCH_CACHE_TTL
+
+
+# Chat-history roles that become graph messages
+_HISTORY_MESSAGE_TYPES = {"user": HumanMessage, "assistant": AIMessage}
+
+# Spacing fixes applied by _format_for_display, in order
+_RE_HEADING = re.compile(r'(#+\s+[^\n]+)\n(?!\n)')
+_RE_BOLD = re.compile(r'(\*\*[^\*]+\*\*)\n(?!\n)')
+_RE_BULLET = re.compile(r'([^\n])\n([\•\-\*]\s)')
+_RE_EMOJI_SECTION = re.compile(r'([^\n])\n([🎯🛒💰🏪✅❌📦➕🔍🎨👕👖👟🎭])')
+_RE_MULTI_NL = re.compile(r'\n{3,}')
+_RE_COLON_CAP = re.compile(r':\n([A-Z])')
+# Characters at least one of the patterns above needs to match
+_FORMAT_TRIGGERS = frozenset('#*•-:🎯🛒💰🏪✅❌📦➕🔍🎨👕👖👟🎭')
+
+@lru_cache(maxsize=256)
+def _format_for_display(response: str) -> str:
+    """Pure formatting behind OutfitterAssistant._format_response_for_display."""
+    # Ensure consistent line breaks
+    response = response.replace('\r\n', '\n')
+    
+    # Nothing for the passes below to act on (plain sentences, most errors)
+    if _FORMAT_TRIGGERS.isdisjoint(response) and '\n\n\n' not in response:
+        return response.strip()
+    
+    # Add extra line break after headings (lines starting with #)
+    response = _RE_HEADING.sub(r'\1\n\n', response)
+    
+    # Add extra line break after bold text blocks (lines with **)
+    response = _RE_BOLD.sub(r'\1\n\n', response)
+    
+    # Ensure bullet points have proper spacing
+    # Add line break before bullet point groups if not already there
+    response = _RE_BULLET.sub(r'\1\n\n\2', response)
+    
+    # Ensure spacing between sections (emojis followed by text)
+    response = _RE_EMOJI_SECTION.sub(r'\1\n\n\2', response)
+    
+    # Clean up multiple consecutive line breaks (max 2)
+    response = _RE_MULTI_NL.sub('\n\n', response)
+    
+    # Ensure there's a line break after ":" in section headers
+    response = _RE_COLON_CAP.sub(r':\n\n\1', response)
+    
+    return response.strip()
+
+
+# Selection prompts appended to a product presentation, by result count
+_INSTR_SMALL = """💡 **What would you like to do?**
+• Tell me the number of any item you're interested in (e.g., "I like #1")
+• Ask questions about sizing, colors, or details
+• Request a different search or more options
+• Get styling advice for any of these items"""
+
+_INSTR_MED = """💡 **How to proceed:**
+• Choose items by number (e.g., "Show me more about #2 and #5") 
+• Ask for specific details about sizing, materials, or colors
+• Request to see more options or try a different search
+• Get styling suggestions for putting together an outfit"""
+
+_INSTR_LARGE = """💡 **Next steps:**
+• Select specific items by number (e.g., "I'm interested in #1, #3, and #7")
+• Ask me to narrow down options based on price, style, or store preference
+• Request more details about any items that caught your eye
+• Let me know if you'd like styling advice or outfit suggestions"""
+
+# Shared reply when a search comes back empty ({adj} varies by caller)
+_NO_PRODUCTS_TMPL = """I'd love to show you some {adj} {desc} options, but I checked our stores and unfortunately don't have exactly what you're looking for right now. 
+
+But don't worry! I can help you find something similar that you'll love:
+
+✨ **Let's try these alternatives:**
+• Search for a broader category (e.g., "shirts" instead of "red button-up shirts")
+• Try different color options 
+• Look at similar styles that might work for you
+• I can show you what's currently trending
+
+What would you like to explore? I'm here to help you find the perfect pieces!"""
+
+_SCRAPING_ERROR_MESSAGE = """I'm having trouble accessing the stores right now. Let me help you in other ways - what would you like to know about fashion or styling?"""
+
+# Router keyword checks are substring matches ("#2", "add it", "show" contains
+# "how"); each list is compiled into one alternation so a check is a single scan.
+_SELECTION_KEYWORDS = (
+    '#', 'number', 'option',
+    'i want', 'i\'ll take', 'i like',
+    'add', 'choose', 'select', 'pick',
+    'get me', 'buy', 'purchase'
+)
+_QUESTION_KEYWORDS = (
+    'how', 'what', 'why', 'which', 'when', 'where',
+    'should i', 'can you', 'tell me', 'show me more',
+    'style', 'match', 'wear', 'look', 'advice',
+    'recommend', 'suggest', 'help', 'think'
+)
+_ORDINALS = ('first', 'second', 'third', 'fourth', 'fifth')
+_SEARCH_TERMS = ('show me', 'looking for', 'need', 'want')
+
+
+def _substring_pattern(keywords: Tuple[str, ...]) -> "re.Pattern[str]":
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+_SELECTION_RE = _substring_pattern(_SELECTION_KEYWORDS)
+_QUESTION_RE = _substring_pattern(_QUESTION_KEYWORDS)
+_ORDINAL_RE = _substring_pattern(_ORDINALS)
+_SEARCH_TERM_RE = _substring_pattern(_SEARCH_TERMS)
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def _search_cache_key(state: OutfitterState) -> str:
+    """The searcher only reads search_criteria, so that alone keys its cache."""
+    return json.dumps(state.get("search_criteria") or {}, sort_keys=True, default=str)
+
 class OutfitterAssistant:
     """
     Main Outfitter.ai shopping assistant using LangGraph with real scraping integration.
     Includes full cart management with state persistence.
     """
+    
+    # Fixed attribute set: every node wrapper reads these on each turn
+    __slots__ = (
+        "intent_classifier", "greeter", "needs_analyzer", "clarification_asker",
+        "general_responder", "selection_handler", "cart_manager", "upsell_agent",
+        "memory", "graph", "session_id",
+        "product_verifier", "_verifier_cache", "_verifier_cache_lock", "_virtual_tryon_agent",
+        "last_products", "_last_state",
+    )
         
     def __init__(self):
         # Initialize all conversation agents
@@ -53,6 +202,11 @@ class OutfitterAssistant:
         self.graph = None
         self.session_id = str(uuid.uuid4())
         self.upsell_agent = UpsellAgent() 
+        self.product_verifier = SimpleProductVerifier()
+        self._verifier_cache = OrderedDict()
+        # Batches are verified from several worker threads at once
+        self._verifier_cache_lock = threading.Lock()
+        self._virtual_tryon_agent = None  # created on first try-on request
         
         # Store products and state for Gradio access
         self.last_products = []
@@ -71,7 +225,11 @@ class OutfitterAssistant:
         workflow.add_node("needs_analyzer", self._needs_analyzer_node)
         workflow.add_node("clarification_asker", self._clarification_node)
         workflow.add_node("general_responder", self._general_responder_node)
-        workflow.add_node("parallel_searcher", self._real_parallel_searcher)
+        workflow.add_node(
+            "parallel_searcher",
+            self._real_parallel_searcher,
+            cache_policy=CachePolicy(key_func=_search_cache_key, ttl=SEARCH_CACHE_TTL),
+        )
         workflow.add_node("product_presenter", self._product_presenter_node)
         workflow.add_node("empty_results_handler", self._empty_results_handler_node)
         workflow.add_node("selection_handler", self._selection_handler_node)
@@ -201,7 +359,7 @@ class OutfitterAssistant:
         workflow.add_edge("upsell_agent", END)
         
         # Compile with memory
-        self.graph = workflow.compile(checkpointer=self.memory)
+        self.graph = workflow.compile(checkpointer=self.memory, cache=InMemoryCache())
         print("✅ Real scraping integration setup complete!")
 
     # ============ AGENT NODE WRAPPERS ============
@@ -227,7 +385,7 @@ class OutfitterAssistant:
         Enhanced AI-powered general response node.
         CRITICAL FIX: Preserves cart state across questions.
         """
-        print("💬 GeneralResponder: Handling general query...")
+        logger.debug("💬 GeneralResponder: Handling general query...")
         
         result = self.general_responder.respond_to_general_query(state)
         
@@ -239,14 +397,14 @@ class OutfitterAssistant:
         selected_products = state.get("selected_products", [])
         
         if products_shown and awaiting_selection:
-            print(f"   ✓ Preserving {len(products_shown)} shown products for selection")
+            logger.debug("   ✓ Preserving %s shown products for selection", len(products_shown))
             result["products_shown"] = products_shown
             result["awaiting_selection"] = True
             result["conversation_stage"] = "presenting"
         
         # CRITICAL FIX: Always preserve cart
         if selected_products:
-            print(f"   ✓ Preserving {len(selected_products)} items in cart")
+            logger.debug("   ✓ Preserving %s items in cart", len(selected_products))
             result["selected_products"] = selected_products
         else:
             # Even if empty, explicitly set it to preserve the field
@@ -263,20 +421,20 @@ class OutfitterAssistant:
         Handle product selections.
         ADDED: Debug logging to track cart flow.
         """
-        print("🛒 SelectionHandler: Processing product selection...")
+        logger.debug("🛒 SelectionHandler: Processing product selection...")
         
         result = self.selection_handler.handle_selection(state)
         
         # DEBUG: Track what's being set
-        print(f"   🔍 Selection result next_step: {result.get('next_step')}")
-        print(f"   🔍 Pending additions: {len(result.get('pending_cart_additions', []))}")
-        print(f"   🔍 Existing cart preserved: {len(result.get('selected_products', []))}")
+        logger.debug("   🔍 Selection result next_step: %s", result.get('next_step'))
+        logger.debug("   🔍 Pending additions: %s", len(result.get('pending_cart_additions', [])))
+        logger.debug("   🔍 Existing cart preserved: %s", len(result.get('selected_products', [])))
         
         # CRITICAL FIX: Ensure state is properly merged
         # The issue is that LangGraph might not be merging the state properly
         # Let's explicitly ensure the state is updated
         if 'pending_cart_additions' in result:
-            print(f"   🔧 FIX: Setting pending_cart_additions: {len(result['pending_cart_additions'])} items")
+            logger.debug("   🔧 FIX: Setting pending_cart_additions: %s items", len(result['pending_cart_additions']))
         
         return result
     
@@ -285,19 +443,19 @@ class OutfitterAssistant:
         Handle cart operations - add, remove, view, clear.
         ADDED: Comprehensive debug logging.
         """
-        print(f"🛒 CART MANAGER NODE CALLED")
-        print(f"   📦 Current cart: {len(state.get('selected_products', []))} items")
-        print(f"   ➕ Pending additions: {len(state.get('pending_cart_additions', []))} items")
-        print(f"   🔧 Operation: {state.get('cart_operation', 'add')}")
+        logger.debug("🛒 CART MANAGER NODE CALLED")
+        logger.debug("   📦 Current cart: %s items", len(state.get('selected_products', [])))
+        logger.debug("   ➕ Pending additions: %s items", len(state.get('pending_cart_additions', [])))
+        logger.debug("   🔧 Operation: %s", state.get('cart_operation', 'add'))
         
         # CRITICAL DEBUG: Check if pending_cart_additions is actually in state
         pending = state.get('pending_cart_additions', [])
-        print(f"   🔍 DEBUG: pending_cart_additions type: {type(pending)}")
-        print(f"   🔍 DEBUG: pending_cart_additions content: {pending}")
+        logger.debug("   🔍 DEBUG: pending_cart_additions type: %s", type(pending))
+        logger.debug("   🔍 DEBUG: pending_cart_additions content: %s", pending)
         
         result = self.cart_manager.process_cart_action(state)
         
-        print(f"   ✅ After processing: {len(result.get('selected_products', []))} items in cart")
+        logger.debug("   ✅ After processing: %s items in cart", len(result.get('selected_products', [])))
         
         return result
     
@@ -305,14 +463,15 @@ class OutfitterAssistant:
         """
         Handle virtual try-on operations.
         """
-        print("🎭 VIRTUAL TRY-ON NODE CALLED")
+        logger.debug("🎭 VIRTUAL TRY-ON NODE CALLED")
         
         try:
-            from agents.conversation_agents.virtualTryOnAgent import VirtualTryOnAgent
-            virtual_tryon_agent = VirtualTryOnAgent()
-            return virtual_tryon_agent.process_virtual_tryon(state)
+            if self._virtual_tryon_agent is None:
+                from agents.conversation_agents.virtualTryOnAgent import VirtualTryOnAgent
+                self._virtual_tryon_agent = VirtualTryOnAgent()
+            return self._virtual_tryon_agent.process_virtual_tryon(state)
         except Exception as e:
-            print(f"❌ Virtual try-on error: {e}")
+            logger.error("❌ Virtual try-on error: %s", e)
             return {
                 "messages": [AIMessage(content=f"❌ Sorry, virtual try-on is temporarily unavailable: {str(e)}")],
                 "conversation_stage": "cart",
@@ -321,30 +480,27 @@ class OutfitterAssistant:
     
     # ============ REAL SCRAPING INTEGRATION NODES ============
     
-    def _real_parallel_searcher(self, state: OutfitterState) -> Dict[str, Any]:
+    async def _real_parallel_searcher(self, state: OutfitterState) -> Dict[str, Any]:
         """Real parallel searcher with client-side filtering and debug logging"""
-        print("🔍 Starting real parallel search across stores...")
+        logger.debug("🔍 Starting real parallel search across stores...")
         search_criteria = state.get("search_criteria", {})
-        search_query = self._build_search_query_from_criteria(search_criteria)
-        
-        if not search_query:
-            search_query = "clothing"
+        search_query, user_request = self._build_query_strings(search_criteria)
         
-        print(f"🔎 Searching for: '{search_query}' with criteria: {search_criteria}")
+        logger.debug("🔎 Searching for: '%s' with criteria: %s", search_query, search_criteria)
         
         try:
             # Run Google-only scraping (no fallback to old methods)
-            products = search_products_google_only(
+            products = await search_products_google_only_async(
                 query=search_query,
                 max_products=100
             )
             
-            print(f"✅ Found {len(products)} products from scraping")
+            logger.debug("✅ Found %s products from scraping", len(products))
             
-            # Convert ProductData to dicts
-            product_dicts = []
-            for product in products:
-                product_dict = {
+            # Convert ProductData to dicts (every key is always set; the presenter
+            # indexes name/price/url/is_on_sale directly)
+            product_dicts = [
+                {
                     "name": product.name,
                     "price": product.price,
                     "brand": product.brand,
@@ -354,26 +510,33 @@ class OutfitterAssistant:
                     "is_on_sale": product.is_on_sale,
                     "extracted_at": product.extracted_at.isoformat() if product.extracted_at else None
                 }
-                product_dicts.append(product_dict)
+                for product in products
+            ]
+            
+            # The same product page often comes back from several image results;
+            # keep the first occurrence of each URL (products without one are kept)
+            seen_urls = set()
+            product_dicts = [
+                product for product in product_dicts
+                if not product["url"] or not (product["url"] in seen_urls or seen_urls.add(product["url"]))
+            ]
             
             # Client-side filtering
             if len(product_dicts) > 0:
-                from tools.simple_product_verifier import SimpleProductVerifier
-                verifier = SimpleProductVerifier()
-                
-                user_request = self._build_user_request_string(search_criteria, search_query)
-                
-                print(f"🔍 Applying AI filter for: '{user_request}'")
+                logger.debug("🔍 Applying AI filter for: '%s'", user_request)
                 original_count = len(product_dicts)
                 
-                product_dicts = verifier.filter_relevant_products(user_request, product_dicts)
+                product_dicts = await self._verify_products_batched(user_request, product_dicts)
                 
-                print(f"📊 Filtering result: {original_count} → {len(product_dicts)} products")
+                logger.debug("📊 Filtering result: %s → %s products", original_count, len(product_dicts))
             
             if len(product_dicts) > 0:
                 return {
                     "messages": [AIMessage(content=f"Great! I found {len(product_dicts)} products from multiple stores. Let me show you:")],
                     "search_results": product_dicts,
+                    "verification_completed": True,
+                    "search_query": search_query,
+                    "user_request": user_request,
                     "conversation_stage": "presenting",
                     "next_step": "product_presenter"
                 }
@@ -381,16 +544,78 @@ class OutfitterAssistant:
                 return self._handle_no_products_found_sync(search_query, search_criteria)
                 
         except Exception as e:
-            print(f"❌ Scraping error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Scraping error: %s", e)
             return self._handle_scraping_error_sync(search_query, str(e))
     
+    async def _verify_products_batched(self, user_request: str, products: List[Dict]) -> List[Dict]:
+        """
+        Verify products in store-aligned batches of up to VERIFIER_BATCH_SIZE,
+        running the batches concurrently. Kept products stay in input order.
+        """
+        # Batches hold positions into `products`, so results are merged back by
+        # position (and URL) rather than by object identity
+        by_store = defaultdict(list)
+        for position, product in enumerate(products):
+            by_store[product.get("store_name")].append(position)
+        
+        batches = [[]]
+        for store_positions in by_store.values():
+            if batches[-1] and len(batches[-1]) + len(store_positions) > VERIFIER_BATCH_SIZE:
+                batches.append([])
+            batches[-1].extend(store_positions)
+        
+        if len(batches) == 1:
+            return await asyncio.to_thread(self._verify_products, user_request, products)
+        
+        logger.debug("🔀 Verifying %s products in %s concurrent batches", len(products), len(batches))
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._verify_products, user_request, [products[i] for i in batch]) for batch in batches)
+        )
+        kept = set()
+        for batch, batch_result in zip(batches, results):
+            kept_urls = {product.get("url", "") for product in batch_result}
+            kept.update(i for i in batch if products[i].get("url", "") in kept_urls)
+        return [products[i] for i in sorted(kept)]
+    
+    def _verify_products(self, user_request: str, products: List[Dict]) -> List[Dict]:
+        """
+        Run the relevance verifier, reusing the result for an identical
+        request over the same set of product URLs. Only the kept URLs are
+        cached, so a hit filters the products passed in (fresh prices, sale
+        flags and images) rather than returning an earlier scrape's dicts.
+        """
+        request_key = " ".join(user_request.lower().split())
+        key = (request_key, tuple(sorted(p.get("url", "") for p in products)))
+        now = time.monotonic()
+        with self._verifier_cache_lock:
+            cached = self._verifier_cache.get(key)
+            if cached is not None and now - cached[0] > VERIFIER_CACHE_TTL:
+                del self._verifier_cache[key]
+                cached = None
+            if cached is not None:
+                self._verifier_cache.move_to_end(key)
+        if cached is not None:
+            logger.debug("♻️ Reusing verifier result for: '%s'", user_request)
+            kept_urls = cached[1]
+            return [p for p in products if p.get("url", "") in kept_urls]
+        
+        relevant = self.product_verifier.filter_relevant_products(user_request, products)
+        kept_urls = frozenset(p.get("url", "") for p in relevant)
+        # The filtered list is already verified for this request, so a
+        # re-check of exactly those products (the presenter) is a lookup too
+        relevant_key = (request_key, tuple(sorted(p.get("url", "") for p in relevant)))
+        with self._verifier_cache_lock:
+            self._verifier_cache[key] = (now, kept_urls)
+            self._verifier_cache[relevant_key] = (now, kept_urls)
+            while len(self._verifier_cache) > VERIFIER_CACHE_SIZE:
+                self._verifier_cache.popitem(last=False)
+        return relevant
+    
     def _product_presenter_node(self, state: OutfitterState) -> Dict[str, Any]:
         """
         Present products with relevance verification AND store for Gradio access.
         """
-        print("📱 Formatting products for presentation with AI verification...")
+        logger.debug("📱 Formatting products for presentation with AI verification...")
         
         search_results = state.get("search_results", [])
         search_criteria = state.get("search_criteria", {})
@@ -400,18 +625,18 @@ class OutfitterAssistant:
             self.last_products = []
             return self._handle_empty_presentation(search_query)
         
-        # Build user request string
-        user_request = self._build_user_request_string(search_criteria, search_query)
-        
-        # AI verification
-        from tools.simple_product_verifier import SimpleProductVerifier
-        verifier = SimpleProductVerifier()
+        # User request string (the searcher stores the one it verified against)
+        user_request = state.get("user_request") or self._build_query_strings(search_criteria)[1]
         
-        relevant_products = verifier.filter_relevant_products(user_request, search_results)
+        # AI verification (skipped when the searcher already filtered these)
+        if state.get("verification_completed"):
+            relevant_products = search_results
+        else:
+            relevant_products = self._verify_products(user_request, search_results)
         
         # CRITICAL: Store products for Gradio access
         self.last_products = relevant_products
-        print(f"🔗 Stored {len(relevant_products)} products for Gradio access")
+        logger.debug("🔗 Stored %s products for Gradio access", len(relevant_products))
         
         if not relevant_products:
             self.last_products = []
@@ -435,14 +660,11 @@ Would you like me to:
             }
         
         # Group by store and build presentation
-        products_by_store = {}
+        products_by_store = defaultdict(list)
         for product in relevant_products:
-            store_name = product.get("store_name", "Unknown Store")
-            if store_name not in products_by_store:
-                products_by_store[store_name] = []
-            products_by_store[store_name].append(product)
+            products_by_store[product.get("store_name", "Unknown Store")].append(product)
         
-        presentation = self._build_product_presentation(products_by_store, user_request)
+        presentation = self._build_product_presentation(products_by_store, user_request, len(relevant_products))
         selection_instructions = self._build_selection_instructions(len(relevant_products))
         
         full_message = f"{presentation}\n\n{selection_instructions}"
@@ -462,23 +684,21 @@ Would you like me to:
         """
         Smart routing based on intent with cart awareness.
         """
-        import re
-        
         next_step = state.get("next_step", "general_responder")
         current_intent = state.get("current_intent", "")
         
         # PRIORITY 1: Respect intent classifier decisions first
         if current_intent == "search":
-            print(f"   🔍 Routing: SEARCH intent → needs_analyzer")
+            logger.debug("   🔍 Routing: SEARCH intent → needs_analyzer")
             return "needs_analyzer"
         
         if current_intent == "cart":
-            print(f"   🛒 Routing: CART intent → cart_manager")
+            logger.debug("   🛒 Routing: CART intent → cart_manager")
             return "cart_manager"
         
         # Check if this is an upsell search
         if state.get("upsell_search", False):
-            print(f"   🎁 Routing: UPSELL SEARCH → needs_analyzer")
+            logger.debug("   🎁 Routing: UPSELL SEARCH → needs_analyzer")
             return "needs_analyzer"
         
         # PRIORITY 2: Handle product selection when products are shown
@@ -498,52 +718,33 @@ Would you like me to:
                 
                 content_lower = content.lower()
                 
-                # Selection indicators
-                selection_keywords = [
-                    '#', 'number', 'option',
-                    'i want', 'i\'ll take', 'i like', 
-                    'add', 'choose', 'select', 'pick',
-                    'get me', 'buy', 'purchase'
-                ]
-                
-                # Question indicators (but NOT for search queries)
-                question_keywords = [
-                    'how', 'what', 'why', 'which', 'when', 'where',
-                    'should i', 'can you', 'tell me', 'show me more',
-                    'style', 'match', 'wear', 'look', 'advice',
-                    'recommend', 'suggest', 'help', 'think'
-                ]
-                
-                # Check for ordinal numbers
-                ordinals = ['first', 'second', 'third', 'fourth', 'fifth']
-                has_ordinal = any(ord in content_lower for ord in ordinals)
-                
-                # Check for explicit numbers
-                has_numbers = bool(re.search(r'\b\d+\b', content))
+                has_ordinal = bool(_ORDINAL_RE.search(content_lower))
+                has_numbers = bool(_NUMBER_RE.search(content))
+                has_question = bool(_QUESTION_RE.search(content_lower))
                 
                 # Decision logic
                 is_selection = (
-                    any(keyword in content_lower for keyword in selection_keywords) or
-                    (has_numbers and not any(q in content_lower for q in question_keywords)) or
+                    bool(_SELECTION_RE.search(content_lower)) or
+                    (has_numbers and not has_question) or
                     has_ordinal
                 )
                 
                 # FIXED: Don't treat "show me [product]" as a question when products are shown
                 # Only treat as question if it's asking about the shown products specifically
-                is_question_about_shown_products = any(keyword in content_lower for keyword in question_keywords) and not any(search_term in content_lower for search_term in ['show me', 'looking for', 'need', 'want'])
+                is_question_about_shown_products = has_question and not _SEARCH_TERM_RE.search(content_lower)
                 
                 # Route based on primary intent
                 if is_selection and not is_question_about_shown_products:
-                    print(f"   🛒 Routing: SELECTION detected → selection_handler")
+                    logger.debug("   🛒 Routing: SELECTION detected → selection_handler")
                     return "selection_handler"
                 
                 if is_question_about_shown_products:
-                    print(f"   💬 Routing: QUESTION about shown products → general_responder")
+                    logger.debug("   💬 Routing: QUESTION about shown products → general_responder")
                     return "general_responder"
                 
                 # If unclear but has numbers, assume selection
                 if has_numbers:
-                    print(f"   🔢 Routing: Numbers detected → selection_handler")
+                    logger.debug("   🔢 Routing: Numbers detected → selection_handler")
                     return "selection_handler"
         
         # PRIORITY 3: Handle clarification needs
@@ -572,50 +773,50 @@ Would you like me to:
     def _route_after_search(self, state: OutfitterState) -> str:
         """Route after parallel search"""
         
-        print(f"🔄 ROUTING AFTER SEARCH:")
+        logger.debug("🔄 ROUTING AFTER SEARCH:")
         
         search_results = state.get("search_results", [])
         next_step = state.get("next_step", None)
         conversation_stage = state.get("conversation_stage", "unknown")
         scraping_error = state.get("scraping_error", False)
         
-        print(f"   🔍 search_results count: {len(search_results)}")
-        print(f"   ➡️  next_step: {next_step}")
-        print(f"   🎭 conversation_stage: {conversation_stage}")
+        logger.debug("   🔍 search_results count: %s", len(search_results))
+        logger.debug("   ➡️  next_step: %s", next_step)
+        logger.debug("   🎭 conversation_stage: %s", conversation_stage)
         
         # Route by explicit next_step
         if next_step == "product_presenter":
-            print("✅ Routing to product_presenter")
+            logger.debug("✅ Routing to product_presenter")
             return "product_presenter"
         
         # Route by results count
         if len(search_results) > 0:
-            print(f"✅ Found {len(search_results)} products - routing to product_presenter")
+            logger.debug("✅ Found %s products - routing to product_presenter", len(search_results))
             return "product_presenter"
         
         # CRITICAL FIX: Handle empty results properly instead of clarification loop
         if len(search_results) == 0:
-            print("❌ No products found - routing to empty results handler")
+            logger.debug("❌ No products found - routing to empty results handler")
             return "empty_results_handler"
         
         # Error handling
         if scraping_error:
-            print("❌ Routing to general_responder (scraping error)")
+            logger.debug("❌ Routing to general_responder (scraping error)")
             return "general_responder"
         
         # Default fallback
-        print("🔄 Routing to general_responder (fallback)")
+        logger.debug("🔄 Routing to general_responder (fallback)")
         return "general_responder"
     
     def _route_after_selection(self, state: OutfitterState) -> str:
         """Route after user makes selection"""
         next_step = state.get("next_step", "wait_for_user")
         
-        print(f"   🔄 Routing after selection: next_step = {next_step}")
+        logger.debug("   🔄 Routing after selection: next_step = %s", next_step)
         
         # CRITICAL: Route to cart_manager first to add items
         if next_step == "cart_manager":
-            print(f"   🛒 → cart_manager (to add items)")
+            logger.debug("   🛒 → cart_manager (to add items)")
             return "cart_manager"
         
         # Then check for upsell after cart is updated
@@ -635,12 +836,12 @@ Would you like me to:
     
     def _route_after_empty_results(self, state: OutfitterState) -> str:
         """Route after empty results - always wait for user"""
-        print("🔄 Routing after empty results: wait_for_user")
+        logger.debug("🔄 Routing after empty results: wait_for_user")
         return "wait_for_user"
     
     def _route_after_virtual_tryon(self, state: OutfitterState) -> str:
         """Route after virtual try-on - always wait for user"""
-        print("🔄 Routing after virtual try-on: wait_for_user")
+        logger.debug("🔄 Routing after virtual try-on: wait_for_user")
         return "wait_for_user"
     
     def _route_after_cart_action(self, state: OutfitterState) -> str:
@@ -650,7 +851,7 @@ Would you like me to:
         """
         next_step = state.get("next_step", "wait_for_user")
         
-        print(f"   🔄 Routing after cart action: {next_step}")
+        logger.debug("   🔄 Routing after cart action: %s", next_step)
         
         # Check if we should show upsell after adding items
         selected_products = state.get("selected_products", [])
@@ -658,7 +859,7 @@ Would you like me to:
         
         # Show upsell once after they add something to cart
         if selected_products and not already_showed:
-            print("   🎯 → Routing to upsell_agent (after cart update)")
+            logger.debug("   🎯 → Routing to upsell_agent (after cart update)")
             return "upsell_agent"
         
         if next_step == "product_presenter":
@@ -671,143 +872,74 @@ Would you like me to:
     
     # ============ HELPER METHODS ============
     
-    def _build_search_query_from_criteria(self, criteria: Dict[str, Any]) -> str:
-        """Build a search query string from extracted user criteria"""
+    def _build_query_strings(self, criteria: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Build (search_query, user_request) from extracted user criteria in one pass.
+        The search query is what we send to the scraper (no size, "clothing" when
+        there is no category); the user request is the fuller description the
+        AI verifier checks results against.
+        """
         query_parts = []
+        request_parts = []
+        
+        # Gender first for better targeting / AI understanding
+        # Values arrive stripped from NeedsAnalyzer, the only node that routes here
+        for key in ("gender", "color_preference", "category", "size", "style_preference"):
+            value = criteria.get(key)
+            if not value:
+                if key == "category":
+                    query_parts.append("clothing")
+            elif key == "size":
+                request_parts.append(f"size {value}")
+            else:
+                query_parts.append(value)
+                request_parts.append(value)
         
-        # Add gender first for better targeting
-        gender = criteria.get("gender", "").strip()
-        if gender:
-            query_parts.append(gender)
-        
-        color = criteria.get("color_preference", "").strip()
-        if color:
-            query_parts.append(color)
-        
-        category = criteria.get("category", "").strip()
-        if category:
-            query_parts.append(category)
-        else:
-            query_parts.append("clothing")
-        
-        style = criteria.get("style_preference", "").strip()
-        if style:
-            query_parts.append(style)
-        
-        if query_parts:
-            return " ".join(query_parts)
-        
-        return "clothing"
-    
-    def _build_user_request_string(self, criteria: Dict[str, Any], query: str) -> str:
-        """Build clear user request string for AI verification"""
-        parts = []
-        
-        # Add gender first for better AI understanding
-        gender = criteria.get("gender", "")
-        if gender:
-            parts.append(gender)
-        
-        color = criteria.get("color_preference", "")
-        if color:
-            parts.append(color)
-        
-        category = criteria.get("category", "")
-        if category:
-            parts.append(category)
-        
-        size = criteria.get("size", "")
-        if size:
-            parts.append(f"size {size}")
-        
-        style = criteria.get("style_preference", "")
-        if style:
-            parts.append(style)
-        
-        if parts:
-            return " ".join(parts)
-        
-        return query if query != "items" else "clothing"
+        search_query = " ".join(query_parts)
+        return search_query, " ".join(request_parts) or search_query
     
-    def _build_product_presentation(self, products_by_store: Dict[str, List[Dict]], query: str) -> str:
+    def _build_product_presentation(self, products_by_store: Dict[str, List[Dict]], query: str,
+                                    total_products: int) -> str:
         """Build formatted product presentation organized by store"""
-        presentation_parts = []
+        buf = io.StringIO()
         item_number = 1
         
-        total_products = sum(len(products) for products in products_by_store.values())
         store_count = len(products_by_store)
         
-        presentation_parts.append(f"🛍️ Found {total_products} great options from {store_count} stores for '{query}':")
-        presentation_parts.append("")
+        buf.write(f"🛍️ Found {total_products} great options from {store_count} stores for '{query}':\n")
         
         for store_name, products in products_by_store.items():
             if not products:
                 continue
-                
-            presentation_parts.append(f"🏪 **{store_name}:**")
             
-            for product in products[:5]:
-                product_line = self._format_single_product(product, item_number)
-                presentation_parts.append(product_line)
+            # Blank line, store header, then one line per product
+            buf.write(f"\n🏪 **{store_name}:**\n")
+            for product in islice(products, 5):
+                buf.write(self._format_single_product(product, item_number))
+                buf.write("\n")
                 item_number += 1
-            
-            presentation_parts.append("")
         
-        return "\n".join(presentation_parts)
+        return buf.getvalue()
     
     def _format_single_product(self, product: Dict[str, Any], item_number: int) -> str:
-        """Format a single product for display"""
-        name = product.get("name", "Unknown Product")
-        price = product.get("price", "Price unavailable")
-        is_on_sale = product.get("is_on_sale", False)
-        url = product.get("url", "")
-        
-        sale_indicator = " 🔥" if is_on_sale else ""
-        
-        product_line = f"{item_number}. **{name}**{sale_indicator}"
-        product_line += f"\n   💰 {price}"
-        
-        if url:
-            product_line += f"\n   🔗 {url}"
+        """Format a single product for display (dicts built by _real_parallel_searcher)"""
+        url = product["url"]
+        sale_indicator = " 🔥" if product["is_on_sale"] else ""
+        url_line = f"\n   🔗 {url}" if url else ""
         
-        return product_line
+        return f"{item_number}. **{product['name']}**{sale_indicator}\n   💰 {product['price']}{url_line}"
     
     def _build_selection_instructions(self, product_count: int) -> str:
         """Build clear instructions for product selection"""
         if product_count <= 3:
-            return """💡 **What would you like to do?**
-• Tell me the number of any item you're interested in (e.g., "I like #1")
-• Ask questions about sizing, colors, or details
-• Request a different search or more options
-• Get styling advice for any of these items"""
-        
+            return _INSTR_SMALL
         elif product_count <= 8:
-            return """💡 **How to proceed:**
-• Choose items by number (e.g., "Show me more about #2 and #5") 
-• Ask for specific details about sizing, materials, or colors
-• Request to see more options or try a different search
-• Get styling suggestions for putting together an outfit"""
-        
-        else:
-            return """💡 **Next steps:**
-• Select specific items by number (e.g., "I'm interested in #1, #3, and #7")
-• Ask me to narrow down options based on price, style, or store preference
-• Request more details about any items that caught your eye
-• Let me know if you'd like styling advice or outfit suggestions"""
+            return _INSTR_MED
+        return _INSTR_LARGE
     
     def _handle_empty_presentation(self, query: str) -> Dict[str, Any]:
         """Handle case where no products to present"""
-        message = f"""I'd love to show you some great {query} options, but I checked our stores and unfortunately don't have exactly what you're looking for right now. 
-
-But don't worry! I can help you find something similar that you'll love:
-
-✨ **Let's try these alternatives:**
-• Search for a broader category (e.g., "shirts" instead of "red button-up shirts")
-• Try different color options 
-• Look at similar styles that might work for you
-• I can show you what's currently trending
-
-What would you like to explore? I'm here to help you find the perfect pieces!"""
+        message = _NO_PRODUCTS_TMPL.format_map({"adj": "great", "desc": query})
 
         return {
             "messages": [AIMessage(content=message)],
@@ -818,7 +950,7 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
     
     def _empty_results_handler_node(self, state: OutfitterState) -> Dict[str, Any]:
         """Handle case where no products are found after filtering"""
-        print("❌ EmptyResultsHandler: No products found after filtering")
+        logger.debug("❌ EmptyResultsHandler: No products found after filtering")
         
         # Get search context
         search_query = state.get("search_query", "items")
@@ -834,17 +966,7 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
         if not search_description or search_description == "items":
             search_description = f"{search_query}"
         
-        message = f"""I'd love to show you some great {search_description} options, but I checked our stores and unfortunately don't have exactly what you're looking for right now. 
-
-But don't worry! I can help you find something similar that you'll love:
-
-✨ **Let's try these alternatives:**
-• Search for a broader category (e.g., "shirts" instead of "red button-up shirts")
-• Try different color options 
-• Look at similar styles that might work for you
-• I can show you what's currently trending
-
-What would you like to explore? I'm here to help you find the perfect pieces!"""
+        message = _NO_PRODUCTS_TMPL.format_map({"adj": "great", "desc": search_description})
 
         return {
             "messages": [AIMessage(content=message)],
@@ -858,17 +980,7 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
 
     def _handle_no_products_found_sync(self, query: str, criteria: Dict[str, Any]) -> Dict[str, Any]:
         """Handle case where no products are found"""
-        message = f"""I'd love to show you some amazing {query} options, but I checked our stores and unfortunately don't have exactly what you're looking for right now. 
-
-But don't worry! I can help you find something similar that you'll love:
-
-✨ **Let's try these alternatives:**
-• Search for a broader category (e.g., "shirts" instead of "red button-up shirts")
-• Try different color options 
-• Look at similar styles that might work for you
-• I can show you what's currently trending
-
-What would you like to explore? I'm here to help you find the perfect pieces!"""
+        message = _NO_PRODUCTS_TMPL.format_map({"adj": "amazing", "desc": query})
 
         return {
             "messages": [AIMessage(content=message)],
@@ -882,9 +994,9 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
 
     def _handle_scraping_error_sync(self, query: str, error: str) -> Dict[str, Any]:
         """Handle scraping errors"""
-        print(f"Scraping error details: {error}")
+        logger.debug("Scraping error details: %s", error)
         
-        message = """I'm having trouble accessing the stores right now. Let me help you in other ways - what would you like to know about fashion or styling?"""
+        message = _SCRAPING_ERROR_MESSAGE
 
         return {
             "messages": [AIMessage(content=message)],
@@ -911,15 +1023,15 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
         ADDED: Essential method for cart display.
         """
         try:
-            if hasattr(self, '_last_state'):
+            if self._last_state:
                 cart = self._last_state.get("selected_products", [])
-                print(f"🛒 get_current_cart(): Returning {len(cart)} items")
+                logger.debug("🛒 get_current_cart(): Returning %s items", len(cart))
                 return cart
             
-            print(f"🛒 get_current_cart(): No _last_state, returning empty cart")
+            logger.debug("🛒 get_current_cart(): No _last_state, returning empty cart")
             return []
         except Exception as e:
-            print(f"❌ Error getting cart: {e}")
+            logger.error("❌ Error getting cart: %s", e)
             return []
     
     # ============ RESPONSE FORMATTING ============
@@ -929,121 +1041,133 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
         Format AI response for better readability in chat interface.
         Ensures proper spacing, line breaks, and formatting.
         """
-        # Ensure consistent line breaks
-        response = response.replace('\r\n', '\n')
-        
-        # Add extra line break after headings (lines starting with #)
-        response = re.sub(r'(#+\s+[^\n]+)\n(?!\n)', r'\1\n\n', response)
-        
-        # Add extra line break after bold text blocks (lines with **)
-        response = re.sub(r'(\*\*[^\*]+\*\*)\n(?!\n)', r'\1\n\n', response)
-        
-        # Ensure bullet points have proper spacing
-        # Add line break before bullet point groups if not already there
-        response = re.sub(r'([^\n])\n([\•\-\*]\s)', r'\1\n\n\2', response)
-        
-        # Ensure spacing between sections (emojis followed by text)
-        response = re.sub(r'([^\n])\n([🎯🛒💰🏪✅❌📦➕🔍🎨👕👖👟🎭])', r'\1\n\n\2', response)
-        
-        # Clean up multiple consecutive line breaks (max 2)
-        response = re.sub(r'\n{3,}', '\n\n', response)
-        
-        # Ensure there's a line break after ":" in section headers
-        response = re.sub(r':\n([A-Z])', r':\n\n\1', response)
-        
-        return response.strip()
+        return _format_for_display(response)
     
     # ============ MAIN INTERFACE ============
     
-    async def run_conversation(self, message: str, history: List[Dict]) -> List[Dict]:
-        """
-        Run conversation with complete cart management.
-        UPDATED: Stores state for cart access.
-        """
-        print(f"🤖 Processing: '{message}' with {len(history)} history items")
-        
-        config = {"configurable": {"thread_id": self.session_id}}
-        
+    def _build_turn_state(self, message: str, history: List[Dict]) -> OutfitterState:
+        """Build the graph input for a new user message, carrying the cart over from the last turn"""
         # Convert history to proper message format
-        from langchain_core.messages import HumanMessage, AIMessage
-        messages = []
-        for msg in history:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "assistant":
-                messages.append(AIMessage(content=msg["content"]))
+        messages = [
+            _HISTORY_MESSAGE_TYPES[msg["role"]](content=msg["content"])
+            for msg in history
+            if msg["role"] in _HISTORY_MESSAGE_TYPES
+        ]
         
         # Add new user message
         messages.append(HumanMessage(content=message))
         
-        # Build state
-        user_message_count = len([msg for msg in messages if isinstance(msg, HumanMessage)])
+        # First turn of the session? (stops at the first earlier user message)
+        is_first_message = not any(msg["role"] == "user" for msg in history)
         
         # CRITICAL FIX: Preserve cart state between interactions
         existing_cart = []
         existing_products_shown = []
         existing_cart_operation = "add"  # Default cart operation
-        if hasattr(self, '_last_state') and self._last_state:
+        if self._last_state:
             existing_cart = self._last_state.get("selected_products", [])
             existing_products_shown = self._last_state.get("products_shown", [])
             existing_cart_operation = self._last_state.get("cart_operation", "add")
-            print(f"🛒 Preserving cart with {len(existing_cart)} items from previous state")
-            print(f"🛍️ Preserving {len(existing_products_shown)} products shown from previous state")
-            print(f"🔧 Preserving cart operation: {existing_cart_operation}")
+            logger.debug("🛒 Preserving cart with %s items from previous state", len(existing_cart))
+            logger.debug("🛍️ Preserving %s products shown from previous state", len(existing_products_shown))
+            logger.debug("🔧 Preserving cart operation: %s", existing_cart_operation)
         
-        state = {
+        return {
             "messages": messages,
             "current_intent": None,
             "search_criteria": {},
             "search_results": [],
+            "verification_completed": False,
             "selected_products": existing_cart,  # PRESERVE CART
             "products_shown": existing_products_shown,  # PRESERVE: Products currently shown to user
             "pending_cart_additions": [],  # ADD: Items waiting to be added
             "cart_operation": existing_cart_operation,  # PRESERVE: Cart operation from previous state
             "next_step": None,
             "needs_clarification": False,
-            "conversation_stage": "greeting" if user_message_count == 1 else "discovery",
+            "conversation_stage": "greeting" if is_first_message else "discovery",
             "session_id": self.session_id,
-            "created_at": datetime.now().isoformat() if user_message_count == 1 else None
+            "created_at": datetime.now().isoformat() if is_first_message else None
         }
+    
+    def _finish_turn(self, result: Dict[str, Any], message: str, history: List[Dict]) -> List[Dict]:
+        """Store the final graph state and append the turn to the chat history"""
+        # CRITICAL: Store state for cart access
+        self._last_state = result
+        
+        # Debug logging
+        logger.debug("🔄 DEBUG: Final state conversation_stage: %s", result.get('conversation_stage'))
+        logger.debug("🔄 DEBUG: Final cart items: %s", len(result.get('selected_products', [])))
+        logger.debug("✅ Graph execution completed")
+        
+        # Extract the latest assistant message
+        assistant_messages = [msg for msg in result.get("messages", []) if isinstance(msg, AIMessage)]
+        if assistant_messages:
+            latest_response = assistant_messages[-1].content
+        else:
+            latest_response = "I'm here to help you find great clothing! What are you looking for today?"
+        
+        # Format response for better readability
+        formatted_response = self._format_response_for_display(latest_response)
+        
+        # Format response for interface
+        user_msg = {"role": "user", "content": message}
+        assistant_msg = {"role": "assistant", "content": formatted_response}
+        
+        return history + [user_msg, assistant_msg]
+    
+    def _failed_turn(self, message: str, history: List[Dict], error: Exception) -> List[Dict]:
+        """Append an apology for a turn whose graph run raised"""
+        logger.exception("❌ Conversation error: %s", error)
+        
+        # Error handling
+        user_msg = {"role": "user", "content": message}
+        error_msg = {"role": "assistant", "content": "I apologize for the technical hiccup. I'm your fashion and shopping assistant - what can I help you find today?"}
+        return history + [user_msg, error_msg]
+    
+    async def run_conversation(self, message: str, history: List[Dict]) -> List[Dict]:
+        """
+        Run conversation with complete cart management.
+        UPDATED: Stores state for cart access.
+        """
+        logger.debug("🤖 Processing: '%s' with %s history items", message, len(history))
+        
+        config = {"configurable": {"thread_id": self.session_id}}
+        state = self._build_turn_state(message, history)
         
         try:
             # Run the conversation graph
-            result = await self.graph.ainvoke(state, config=config)
-            
-            # CRITICAL: Store state for cart access
-            self._last_state = result
-            
-            # Debug logging
-            print(f"🔄 DEBUG: Final state conversation_stage: {result.get('conversation_stage')}")
-            print(f"🔄 DEBUG: Final cart items: {len(result.get('selected_products', []))}")
-            print(f"✅ Graph execution completed")
-            
-            # Extract the latest assistant message
-            assistant_messages = [msg for msg in result.get("messages", []) if isinstance(msg, AIMessage)]
-            if assistant_messages:
-                latest_response = assistant_messages[-1].content
-            else:
-                latest_response = "I'm here to help you find great clothing! What are you looking for today?"
+            result = await self.graph.ainvoke(state, config=config, durability="exit")
+            return self._finish_turn(result, message, history)
             
-            # Format response for better readability
-            formatted_response = self._format_response_for_display(latest_response)
-            
-            # Format response for interface
-            user_msg = {"role": "user", "content": message}
-            assistant_msg = {"role": "assistant", "content": formatted_response}
+        except Exception as e:
+            return self._failed_turn(message, history, e)
+    
+    async def stream_conversation(self, message: str, history: List[Dict]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run conversation like run_conversation, but report progress as the graph runs.
+        Yields ("node", (node_name, update)) as each node finishes, then
+        ("history", updated_history) once the turn is complete.
+        """
+        logger.debug("🤖 Processing (streaming): '%s' with %s history items", message, len(history))
+        
+        config = {"configurable": {"thread_id": self.session_id}}
+        state = self._build_turn_state(message, history)
+        
+        try:
+            result = None
+            async for mode, chunk in self.graph.astream(
+                state, config=config, stream_mode=["updates", "values"], durability="exit"
+            ):
+                if mode == "values":
+                    result = chunk
+                else:
+                    for node_name, update in chunk.items():
+                        yield "node", (node_name, update)
             
-            return history + [user_msg, assistant_msg]
+            yield "history", self._finish_turn(result or state, message, history)
             
         except Exception as e:
-            print(f"❌ Conversation error: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # Error handling
-            user_msg = {"role": "user", "content": message}
-            error_msg = {"role": "assistant", "content": "I apologize for the technical hiccup. I'm your fashion and shopping assistant - what can I help you find today?"}
-            return history + [user_msg, error_msg]
+            yield "history", self._failed_turn(message, history, e)
     
     def cleanup(self):
         """Clean up conversation resources"""
@@ -1052,6 +1176,20 @@ What would you like to explore? I'm here to help you find the perfect pieces!"""
 
 # ============ MAIN EXECUTION ============
 
+_READY_BANNER = "\n".join([
+    "",
+    "✅ Setup complete!",
+    "🎯 Features:",
+    "   ✓ AI-powered intent classification",
+    "   ✓ Smart clarification questions",
+    "   ✓ Real product search and presentation",
+    "   ✓ Complete cart management with persistence",
+    "   ✓ Cart survives questions and interactions",
+    "",
+    "🛍️ Ready to shop!",
+    "",
+])
+
 def main():
     """Test the Outfitter.ai setup"""
     print("🚀 Starting Outfitter.ai with Complete Cart Management...")
@@ -1059,14 +1197,7 @@ def main():
     assistant = OutfitterAssistant()
     assistant.setup_graph()
     
-    print("\n✅ Setup complete!")
-    print("🎯 Features:")
-    print("   ✓ AI-powered intent classification")
-    print("   ✓ Smart clarification questions")
-    print("   ✓ Real product search and presentation")
-    print("   ✓ Complete cart management with persistence")
-    print("   ✓ Cart survives questions and interactions")
-    print("\n🛍️ Ready to shop!")
+    sys.stdout.write(_READY_BANNER)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Test batched product verification and the verifier result cache
+"""
+
+import sys
+import asyncio
+import threading
+from collections import OrderedDict
+from main import OutfitterAssistant, VERIFIER_BATCH_SIZE
+
+
+class KeepAllVerifier:
+    """Verifier stub that keeps every product and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def filter_relevant_products(self, user_request, products):
+        self.calls += 1
+        return list(products)
+
+
+def create_assistant():
+    """OutfitterAssistant with only the verifier state set up (no LLM clients)"""
+    assistant = OutfitterAssistant.__new__(OutfitterAssistant)
+    assistant.product_verifier = KeepAllVerifier()
+    assistant._verifier_cache = OrderedDict()
+    assistant._verifier_cache_lock = threading.Lock()
+    return assistant
+
+
+def create_mock_products(price):
+    """Three stores x 20 products: more than one verifier batch"""
+    return [
+        {
+            "name": f"{store} Hoodie {i}",
+            "price": price,
+            "url": f"https://{store.lower()}.example.com/products/hoodie-{i}",
+            "store_name": store,
+            "is_on_sale": False,
+        }
+        for store in ("Universal Store", "CultureKings", "Glue Store")
+        for i in range(20)
+    ]
+
+
+def test_repeated_multi_batch_search():
+    """A repeated search over a fresh scrape keeps every product, with the fresh fields"""
+    assistant = create_assistant()
+
+    first = create_mock_products("$68.00")
+    assert len(first) > VERIFIER_BATCH_SIZE
+    kept_first = asyncio.run(assistant._verify_products_batched("black hoodies", first))
+    assert kept_first == first
+
+    # Same URLs, new dicts with a changed price: served from the cache
+    calls = assistant.product_verifier.calls
+    second = create_mock_products("$55.00")
+    kept_second = asyncio.run(assistant._verify_products_batched("black hoodies", second))
+    assert assistant.product_verifier.calls == calls
+    assert len(kept_second) == len(second)
+    assert all(kept is fresh for kept, fresh in zip(kept_second, second))
+    assert all(product["price"] == "$55.00" for product in kept_second)
+    return True
+
+
+def main():
+    """Run all tests"""
+    try:
+        test_repeated_multi_batch_search()
+    except AssertionError as e:
+        print(f"❌ FAIL: {e}")
+        return False
+    print("✅ PASS: repeated multi-batch search")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
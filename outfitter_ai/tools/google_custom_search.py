@@ -7,6 +7,8 @@ import os
 import re
 import json
 import time
+import asyncio
+import aiohttp
 import tldextract
 import requests
 from bs4 import BeautifulSoup
@@ -30,6 +32,7 @@ HEADERS = {
 }
 
 TIMEOUT = 20
+MAX_CONCURRENT_PAGES = 8        # cap on product pages fetched at once in the async path
 REQUEST_DELAY_SEC = 0.7         # polite delay between product-page requests
 API_REQUEST_DELAY_SEC = 0.3     # tiny delay between API retries
 MAX_API_RETRIES = 2             # simple retry for transient errors
@@ -56,6 +59,17 @@ def _get_soup(url: str) -> BeautifulSoup | None:
     except requests.RequestException:
         return None
 
+async def _get_soup_async(session: aiohttp.ClientSession, url: str) -> BeautifulSoup | None:
+    try:
+        async with session.get(url) as resp:
+            if resp.status >= 400:
+                return None
+            text = await resp.text(errors="replace")
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+    # Parsing is CPU-bound; keep it off the event loop
+    return await asyncio.to_thread(BeautifulSoup, text, "html.parser")
+
 def _guess_store_name(url: str, soup: BeautifulSoup | None) -> str | None:
     if soup:
         og_site = soup.find("meta", attrs={"property": "og:site_name"})
@@ -249,7 +263,16 @@ def _merge(primary: Dict[str, Any], fallback: Dict[str, Any]) -> Dict[str, Any]:
     return out
 
 def _enrich_one(product_url: str, api_title: str | None, api_image_url: str | None) -> Dict[str, Any]:
-    soup = _get_soup(product_url)
+    return _enrich_from_soup(product_url, _get_soup(product_url), api_title, api_image_url)
+
+async def _enrich_one_async(session: aiohttp.ClientSession, limit: asyncio.Semaphore,
+                            product_url: str, api_title: str | None, api_image_url: str | None) -> Dict[str, Any]:
+    async with limit:
+        soup = await _get_soup_async(session, product_url)
+    return _enrich_from_soup(product_url, soup, api_title, api_image_url)
+
+def _enrich_from_soup(product_url: str, soup: BeautifulSoup | None,
+                      api_title: str | None, api_image_url: str | None) -> Dict[str, Any]:
     product_ld = _parse_ld_json_products(soup)
     from_ld = _extract_from_product_ld(product_ld) if product_ld else {}
     fallbacks = _extract_fallbacks(product_url, soup)
@@ -317,6 +340,46 @@ def scrape_products_from_google_images(query: str, num: int = 5, start: int = 1)
     print(f"🎯 Successfully scraped {len(out)} products")
     return out
 
+async def scrape_products_from_google_images_async(query: str, num: int = 5, start: int = 1) -> List[Dict[str, Any]]:
+    """
+    Async variant of scrape_products_from_google_images.
+
+    Product pages are fetched concurrently over one aiohttp session, so the
+    enrichment step costs roughly the slowest page instead of the sum of all
+    pages (plus the per-page polite delay).
+    """
+    if "australia" not in query.lower():
+        query = f"{query} australia"
+
+    print(f"🔍 Searching Google for: '{query}'")
+
+    image_results = await asyncio.to_thread(google_image_search, query, num=num, start=start)
+    items = [item for item in image_results if item.get("product_url")]
+    if not items:
+        return []
+
+    limit = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
+        results = await asyncio.gather(
+            *[
+                _enrich_one_async(session, limit, item["product_url"],
+                                  item.get("api_title"), item.get("api_image_url"))
+                for item in items
+            ],
+            return_exceptions=True,
+        )
+
+    out = []
+    for item, rec in zip(items, results):
+        if isinstance(rec, BaseException):
+            print(f"   ❌ Error processing {item['product_url'][:50]}: {rec}")
+        elif rec.get("name"):  # Only add if we got a valid product
+            out.append(rec)
+
+    print(f"🎯 Successfully scraped {len(out)} products")
+    return out
+
 # =========================
 # Integration Helper
 # =========================
@@ -10,7 +10,11 @@ from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 # Import the Google Custom Search functions
-from .google_custom_search import scrape_products_from_google_images, format_for_outfitter
+from .google_custom_search import (
+    scrape_products_from_google_images,
+    scrape_products_from_google_images_async,
+    format_for_outfitter,
+)
 
 load_dotenv()
 
@@ -53,6 +57,23 @@ class GoogleSearchScraper:
             print(f"❌ Google Search error: {e}")
             return []
     
+    async def search_products_async(self, query: str, num_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Async version of search_products; product pages are fetched concurrently.
+        """
+        try:
+            print(f"🔍 Google Search: Searching for '{query}'")
+            
+            raw_products = await scrape_products_from_google_images_async(query, num=num_results)
+            formatted_products = format_for_outfitter(raw_products)
+            
+            print(f"✅ Found {len(formatted_products)} products from Google Search")
+            return formatted_products
+            
+        except Exception as e:
+            print(f"❌ Google Search error: {e}")
+            return []
+    
     def search_by_criteria(self, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Search products based on search criteria.
@@ -271,20 +271,27 @@ def search_with_google(query: str, max_products: int = 10) -> List[ProductData]:
         scraper = GoogleSearchScraper()
         results = scraper.search_products(query, num_results=max_products)
         
-        # Convert to ProductData objects
-        products = []
-        for result in results:
-            products.append(ProductData(
-                name=result.get('name', 'Unknown Product'),
-                price=result.get('price', 'Price not available'),
-                brand=result.get('brand', 'Unknown Brand'),
-                url=result.get('url', ''),
-                image_url=result.get('image_url', ''),
-                store_name=result.get('store_name', 'Unknown Store'),
-                is_on_sale=result.get('is_on_sale', False),
-                extracted_at=datetime.now()
-            ))
+        products = _google_results_to_products(results)
+        logger.info(f"Google Search found {len(products)} products")
+        return products
         
+    except Exception as e:
+        logger.error(f"Google Search error: {e}")
+        return []
+
+async def search_with_google_async(query: str, max_products: int = 10) -> List[ProductData]:
+    """
+    Async Google Custom Search; product pages are enriched concurrently.
+    """
+    if not GOOGLE_SEARCH_AVAILABLE:
+        logger.warning("Google Custom Search not available")
+        return []
+    
+    try:
+        scraper = GoogleSearchScraper()
+        results = await scraper.search_products_async(query, num_results=max_products)
+        
+        products = _google_results_to_products(results)
         logger.info(f"Google Search found {len(products)} products")
         return products
         
@@ -292,6 +299,22 @@ def search_with_google(query: str, max_products: int = 10) -> List[ProductData]:
         logger.error(f"Google Search error: {e}")
         return []
 
+def _google_results_to_products(results: List[Dict[str, Any]]) -> List[ProductData]:
+    """Convert formatted Google results to ProductData objects."""
+    products = []
+    for result in results:
+        products.append(ProductData(
+            name=result.get('name', 'Unknown Product'),
+            price=result.get('price', 'Price not available'),
+            brand=result.get('brand', 'Unknown Brand'),
+            url=result.get('url', ''),
+            image_url=result.get('image_url', ''),
+            store_name=result.get('store_name', 'Unknown Store'),
+            is_on_sale=result.get('is_on_sale', False),
+            extracted_at=datetime.now()
+        ))
+    return products
+
 async def search_hybrid(query: str, max_products: int = 20, include_google: bool = True) -> List[ProductData]:
     """
     Hybrid search combining store-specific scrapers with Google Custom Search.
@@ -386,6 +409,15 @@ def search_products_google_only(query: str, max_products: int = 30) -> List[Prod
 
 async def search_products_google_only_async(query: str, max_products: int = 30) -> List[ProductData]:
     """
-    Async wrapper for Google-only search.
+    Async Google-only search (concurrent product-page fetches).
     """
-    return search_products_google_only(query, max_products)
\ No newline at end of file
+    if not GOOGLE_SEARCH_AVAILABLE:
+        logger.error("Google Custom Search not available")
+        return []
+    
+    try:
+        logger.info(f"🔍 Google Custom Search: '{query}'")
+        return await search_with_google_async(query, max_products)
+    except Exception as e:
+        logger.error(f"Google Custom Search error: {e}")
+        return []
\ No newline at end of file
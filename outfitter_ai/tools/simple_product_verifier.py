@@ -8,6 +8,18 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 import json
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Filtering analysis files are debug output: write them off the request path
+_ANALYSIS_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="filtering-analysis")
+
+
+def _report_analysis_failure(future: Future) -> None:
+    """Surface errors from a background analysis write"""
+    error = future.exception()
+    if error is not None:
+        print(f"   ⚠️ Could not save AI filtering analysis: {error}")
+
 
 class SimpleProductVerifier:
     """AI-powered product verification with intelligent color matching"""
@@ -180,8 +192,11 @@ Return ONLY a JSON array of matching product indices:"""
                     for store, names in store_filtered.items():
                         print(f"      {store}: {len(names)} products - {', '.join(names[:2])}{'...' if len(names) > 2 else ''}")
                 
-                # Save detailed filtering analysis
-                self._save_filtering_analysis(user_request, products, relevant_products, filtered_products, indices)
+                # Save detailed filtering analysis in the background
+                _ANALYSIS_WRITER.submit(
+                    self._save_filtering_analysis,
+                    user_request, list(products), list(relevant_products), filtered_products, indices
+                ).add_done_callback(_report_analysis_failure)
                 
                 return relevant_products
             else: